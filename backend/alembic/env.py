@@ -13,6 +13,8 @@ from app.core.database import Base
 from app.db.models.module import Module
 from app.db.models.cours import Cours
 from app.db.models.user import User
+from app.db.models.summarization_job import SummarizationJob
+from app.db.models.cours_chunk import CoursChunk
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
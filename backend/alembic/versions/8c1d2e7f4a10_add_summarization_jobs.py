@@ -0,0 +1,44 @@
+"""Add summarization_jobs
+
+Revision ID: 8c1d2e7f4a10
+Revises: 4f29fa598c49
+Create Date: 2025-07-02 10:12:31.481205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d2e7f4a10'
+down_revision: Union[str, None] = '4f29fa598c49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('summarization_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('professeur_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('progress_current', sa.Integer(), nullable=False),
+    sa.Column('progress_total', sa.Integer(), nullable=False),
+    sa.Column('time_inserted', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('time_started', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('time_finished', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['professeur_id'], ['Users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_summarization_jobs_id'), 'summarization_jobs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_summarization_jobs_id'), table_name='summarization_jobs')
+    op.drop_table('summarization_jobs')
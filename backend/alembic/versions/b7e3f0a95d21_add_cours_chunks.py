@@ -0,0 +1,42 @@
+"""Add cours_chunks
+
+Revision ID: b7e3f0a95d21
+Revises: 8c1d2e7f4a10
+Create Date: 2025-07-09 16:45:02.118934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f0a95d21'
+down_revision: Union[str, None] = '8c1d2e7f4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cours_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cours_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('start_char', sa.Integer(), nullable=False),
+    sa.Column('end_char', sa.Integer(), nullable=False),
+    sa.Column('chunk_hash', sa.String(length=64), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['cours_id'], ['cours.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cours_chunks_id'), 'cours_chunks', ['id'], unique=False)
+    op.create_index(op.f('ix_cours_chunks_cours_id'), 'cours_chunks', ['cours_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_cours_chunks_cours_id'), table_name='cours_chunks')
+    op.drop_index(op.f('ix_cours_chunks_id'), table_name='cours_chunks')
+    op.drop_table('cours_chunks')
@@ -0,0 +1,34 @@
+"""Add summary_status to cours and cours_id to summarization_jobs
+
+Revision ID: d3a1c9e6f2b4
+Revises: b7e3f0a95d21
+Create Date: 2025-07-10 11:20:37.604215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a1c9e6f2b4'
+down_revision: Union[str, None] = 'b7e3f0a95d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cours', sa.Column('summary_status', sa.String(length=20), server_default='final', nullable=False))
+    op.add_column('summarization_jobs', sa.Column('cours_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_summarization_jobs_cours_id', 'summarization_jobs', 'cours', ['cours_id'], ['id'], ondelete='SET NULL'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_summarization_jobs_cours_id', 'summarization_jobs', type_='foreignkey')
+    op.drop_column('summarization_jobs', 'cours_id')
+    op.drop_column('cours', 'summary_status')
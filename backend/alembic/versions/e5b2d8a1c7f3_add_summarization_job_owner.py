@@ -0,0 +1,28 @@
+"""Add owner to summarization_jobs
+
+Revision ID: e5b2d8a1c7f3
+Revises: d3a1c9e6f2b4
+Create Date: 2025-07-14 09:42:18.271604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2d8a1c7f3'
+down_revision: Union[str, None] = 'd3a1c9e6f2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('summarization_jobs', sa.Column('owner', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('summarization_jobs', 'owner')
@@ -2,7 +2,6 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
-import sys
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -15,27 +14,29 @@ DB_NAME = os.getenv("DB_NAME")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 
-# Print connection details for debugging
-print(f"Attempting to connect to PostgreSQL database:")
-print(f"Host: {DB_HOST}")
-print(f"Port: {DB_PORT}")
-print(f"Database: {DB_NAME}")
-print(f"User: {DB_USER}")
-
 SQLALCHEMY_DATABASE_URL = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
 
-try:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
-    # Test the connection
-    with engine.connect() as connection:
-        print("Successfully connected to the database!")
-except Exception as e:
-    print(f"Error connecting to the database: {str(e)}")
-    print("\nPlease verify:")
-    print("1. PostgreSQL 15 is installed and running")
-    print("2. The database 'mydatabase' exists in pgAdmin 4")
-    print("3. The postgres user has the correct password")
-    sys.exit(1)
+# The engine connects lazily: nothing touches the database until the first query
+engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+
+def check_database_connection():
+    """Open one connection to fail fast at startup when the database is unreachable"""
+    print(f"Attempting to connect to PostgreSQL database:")
+    print(f"Host: {DB_HOST}")
+    print(f"Port: {DB_PORT}")
+    print(f"Database: {DB_NAME}")
+    print(f"User: {DB_USER}")
+
+    try:
+        with engine.connect() as connection:
+            print("Successfully connected to the database!")
+    except Exception as e:
+        print(f"Error connecting to the database: {str(e)}")
+        print("\nPlease verify:")
+        print("1. PostgreSQL 15 is installed and running")
+        print("2. The database 'mydatabase' exists in pgAdmin 4")
+        print("3. The postgres user has the correct password")
+        raise
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """
+    Lazily constructed, process-wide model instances.
+
+    Each model is registered with a loader callable. The loader runs on first
+    use (or from `preload` in a background thread), at most once even when
+    several requests ask for the model at the same time.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._states = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+            self._states.setdefault(name, {"state": "not_loaded", "load_seconds": None, "error": None})
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"No model registered under '{name}'")
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            self._states[name] = {"state": "loading", "load_seconds": None, "error": None}
+            logger.info(f"Loading model '{name}'")
+            start_time = time.time()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._states[name] = {"state": "failed", "load_seconds": None, "error": str(e)}
+                logger.error(f"Error loading model '{name}': {str(e)}")
+                raise
+
+            load_seconds = round(time.time() - start_time, 2)
+            self._models[name] = model
+            self._states[name] = {"state": "ready", "load_seconds": load_seconds, "error": None}
+            logger.info(f"Model '{name}' ready in {load_seconds:.2f} seconds")
+            return model
+
+    def get_if_loaded(self, name: str):
+        """Return the model if it is already loaded, without triggering a load"""
+        return self._models.get(name)
+
+    def preload(self, names: list):
+        """Load the given models one after another in a background thread"""
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    # Already logged and recorded in the model state; keep loading the others
+                    pass
+
+        thread = threading.Thread(target=load_all, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> dict:
+        with self._lock:
+            return {name: dict(state) for name, state in self._states.items()}
+
+    def is_ready(self, names: list = None) -> bool:
+        states = self.status()
+        names = names if names is not None else list(states)
+        return all(states.get(name, {}).get("state") == "ready" for name in names)
+
+model_registry = ModelRegistry()
@@ -11,9 +11,16 @@ class Cours(Base):
     name = Column(String(255), nullable=False)
     transcription = Column(Text, nullable=False)
     summary = Column(Text, nullable=False)
+    summary_status = Column(String(20), nullable=False, default="final", server_default="final")  # draft, final, failed
     professeur_id = Column(Integer, ForeignKey("Users.id"), nullable=False)
     time_inserted = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     module = relationship("Module", back_populates="cours")
-    professeur = relationship("User", back_populates="cours") 
\ No newline at end of file
+    professeur = relationship("User", back_populates="cours")
+    chunks = relationship(
+        "CoursChunk",
+        back_populates="cours",
+        cascade="all, delete-orphan",
+        order_by="CoursChunk.position"
+    ) 
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class CoursChunk(Base):
+    __tablename__ = "cours_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cours_id = Column(Integer, ForeignKey("cours.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    start_char = Column(Integer, nullable=False)
+    end_char = Column(Integer, nullable=False)
+    chunk_hash = Column(String(64), nullable=False)
+    summary = Column(Text, nullable=False)
+
+    # Relationships
+    cours = relationship("Cours", back_populates="chunks")
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class SummarizationJob(Base):
+    __tablename__ = "summarization_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    professeur_id = Column(Integer, ForeignKey("Users.id"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, completed, failed, cancelled
+    cours_id = Column(Integer, ForeignKey("cours.id", ondelete="SET NULL"), nullable=True)  # Course whose draft summary this job refines
+    # Process running the job, "<host>:<pid>:<process start time>"; jobs of dead owners are failed at startup
+    owner = Column(String(255), nullable=True)
+    text = Column(Text, nullable=False)
+    summary = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    progress_current = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=False, default=0)
+    time_inserted = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    time_started = Column(DateTime(timezone=True), nullable=True)
+    time_finished = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.model_registry import model_registry
+import os
+
+router = APIRouter()
+
+# Models that must be loaded before the instance reports ready
+REQUIRED_MODELS = [name for name in os.getenv("REQUIRED_MODELS", "summarization,whisper").split(",") if name]
+
+@router.get("/live")
+def liveness():
+    return {"status": "alive"}
+
+@router.get("/ready")
+def readiness():
+    """Report the load state of every registered model"""
+    models = model_registry.status()
+    ready = model_registry.is_ready(REQUIRED_MODELS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "required": REQUIRED_MODELS, "models": models}
+    )
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 from app.core.database import get_db
 from app.services.professeur.cours_service import CoursService
@@ -30,6 +31,8 @@ class CoursCreate(BaseModel):
     name: str
     transcription: str
     summary: str
+    # Summarization job refining a draft summary; its result replaces `summary` when done
+    refine_job_id: Optional[int] = None
 
 class CoursResponse(BaseModel):
     id: int
@@ -37,6 +40,7 @@ class CoursResponse(BaseModel):
     name: str
     transcription: str
     summary: str
+    summary_status: str
     professeur_id: int
     time_inserted: datetime
     module: ModuleInfo
@@ -52,6 +56,8 @@ class CoursUpdate(BaseModel):
     name: Optional[str]
     transcription: Optional[str]
     summary: Optional[str]
+    # Regenerate the summary from the edited transcription, reusing unchanged chunks
+    resummarize: bool = False
 
 @router.post("/cours", response_model=CoursResponse)
 async def create_cours(
@@ -64,14 +70,18 @@ async def create_cours(
     
     cours_service = CoursService(db)
     try:
-        new_cours = cours_service.create_cours(
+        # Recording the chunk state tokenizes the transcription: keep it off the event loop
+        new_cours = await run_in_threadpool(lambda: cours_service.create_cours(
             module_id=cours.module_id,
             name=cours.name,
             transcription=cours.transcription,
             summary=cours.summary,
-            professeur_id=current_user.id
-        )
+            professeur_id=current_user.id,
+            refine_job_id=cours.refine_job_id
+        ))
         return new_cours
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -107,8 +117,9 @@ async def update_cours(
     cours_service = CoursService(db)
     try:
         # Use exclude_unset=True to only include fields that were actually provided
-        updated_cours = cours_service.update_cours(
-            cours_id, 
+        updated_cours = await run_in_threadpool(
+            cours_service.update_cours,
+            cours_id,
             cours_update.dict(exclude_unset=True), 
             current_user.id
         )
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, Response
 from fastapi.background import BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,10 +7,14 @@ from typing import Optional
 from pydantic import BaseModel
 import os
 from ...services.professeur.recording_service import AudioRecorder
-from ...utils.protectRoute import get_current_user
+from ...services.professeur.recording_encoder import media_type
+from ...utils.protectRoute import get_current_user, authenticate_token
+from ...core.database import SessionLocal
+from ...services.professeur.whisperService import get_whisper_service, live_transcription_queue, whisper_models, STT_LANGUAGE
+from ...services.professeur.live_transcription import LiveTranscriber, WHISPER_SAMPLE_RATE
 from ...db.schemas.user import UserOutput
+import asyncio
 import logging
-import shutil
 import urllib.parse
 
 router = APIRouter()
@@ -29,12 +34,15 @@ def cleanup_temp_file(filepath: str):
         logger.error(f"Error cleaning up temp file {filepath}: {str(e)}")
 
 @router.post("/microphone/start-python-recorder")
-async def start_python_recorder(current_user: UserOutput = Depends(get_current_user)):
+async def start_python_recorder(
+    codec: Optional[str] = Query(None, description="Format the recording is compressed to after stop: wav, flac or opus"),
+    current_user: UserOutput = Depends(get_current_user)
+):
     """Start Python-based audio recording"""
     if current_user.role != "PROFESSEUR":
         raise HTTPException(status_code=403, detail="Only professors can start recording")
     try:
-        result = recorder_instance.start_recording()
+        result = await run_in_threadpool(recorder_instance.start_recording, codec)
         return result
     except HTTPException as he:
         # Re-raise HTTP exceptions as they are already properly formatted
@@ -53,7 +61,7 @@ async def stop_python_recorder(current_user: UserOutput = Depends(get_current_us
     if current_user.role != "PROFESSEUR":
         raise HTTPException(status_code=403, detail="Only professors can stop recording")
     try:
-        result = recorder_instance.stop_recording()
+        result = await run_in_threadpool(recorder_instance.stop_recording)
         return result
     except HTTPException as he:
         # Re-raise HTTP exceptions as they are already properly formatted
@@ -79,20 +87,29 @@ async def get_recording_status(current_user: UserOutput = Depends(get_current_us
 @router.get("/microphone/download-recording")
 async def download_recording(
     background_tasks: BackgroundTasks,
+    format: Optional[str] = Query(None, description="wav: the uncompressed file when kept, which /stt/transcribe reads without decoding"),
     current_user: UserOutput = Depends(get_current_user)
 ):
     """Download the latest recorded file"""
     if current_user.role != "PROFESSEUR":
         raise HTTPException(status_code=403, detail="Only professors can download recordings")
     try:
-        if not recorder_instance.output_filename or not os.path.exists(recorder_instance.output_filename):
+        # Send a copy of the file to prevent cleanup issues
+        temp_dir = os.path.join(os.path.expanduser("~"), "Documents", "recordings", "temp")
+        os.makedirs(temp_dir, exist_ok=True)
+
+        # The compressed file once encoded, the WAV file otherwise; copied before the encoder can remove it
+        copied = await run_in_threadpool(recorder_instance.copy_recording_file, temp_dir, prefer_wav=format == "wav")
+        if not copied:
             logger.error("No recording file found")
             raise HTTPException(status_code=404, detail="No recording file found")
+        recording_file, temp_file = copied
+        logger.info(f"File copied to temp location: {temp_file}")
         
         # Get the base filename from the full path
-        filename = os.path.basename(recorder_instance.output_filename)
+        filename = os.path.basename(recording_file)
         logger.info(f"Preparing to send file: {filename}")
-        logger.info(f"Full path: {recorder_instance.output_filename}")
+        logger.info(f"Full path: {recording_file}")
         
         # URL encode the filename for the header
         encoded_filename = urllib.parse.quote(filename)
@@ -109,23 +126,14 @@ async def download_recording(
         }
         logger.info(f"Setting headers: {headers}")
         
-        # Create a copy of the file to prevent cleanup issues
-        temp_dir = os.path.join(os.path.expanduser("~"), "Documents", "recordings", "temp")
-        os.makedirs(temp_dir, exist_ok=True)
-        temp_file = os.path.join(temp_dir, filename)
-        
         try:
-            # Copy the file to temp directory
-            shutil.copy2(recorder_instance.output_filename, temp_file)
-            logger.info(f"File copied to temp location: {temp_file}")
-            
             # Add cleanup task
             background_tasks.add_task(cleanup_temp_file, temp_file)
             
             # Create response with headers
             response = FileResponse(
                 temp_file,
-                media_type="audio/wav",
+                media_type=media_type(recording_file),
                 filename=filename,
                 headers=headers
             )
@@ -153,4 +161,134 @@ async def cleanup_recorder(current_user: UserOutput = Depends(get_current_user))
         recorder_instance.cleanup()
         return {"message": "Recorder cleaned up successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/microphone/recover-recordings")
+async def recover_recordings(current_user: UserOutput = Depends(get_current_user)):
+    """Rebuild recordings interrupted by a crash from their segments"""
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can recover recordings")
+    try:
+        recovered = await run_in_threadpool(recorder_instance.recover_interrupted_recordings)
+        return {"recovered": recovered}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.websocket("/microphone/live-transcription")
+async def live_transcription(
+    websocket: WebSocket,
+    token: str = Query(...),
+    source: str = Query("recorder", description="recorder: tap the Python recorder; client: binary 16-bit PCM frames sent on the socket"),
+    sample_rate: int = Query(WHISPER_SAMPLE_RATE, description="Sample rate of client audio"),
+    channels: int = Query(1, description="Channel count of client audio"),
+    model_size: Optional[str] = Query(None)
+):
+    """
+    Stream partial and final transcript segments while a lecture is recorded.
+
+    Browsers cannot set headers on a WebSocket, so the JWT is passed as the
+    `token` query parameter. Messages sent to the client are JSON objects:
+    {"type": "partial" | "final", "text", "start", "end"}, then
+    {"type": "done", "text"} with the whole transcript. The client sends the
+    text message "stop" to end the stream (with source=recorder, the end of
+    the recording also ends it). Passes run on their own threads and model copy, apart from
+    /stt/transcribe, and the session ends as soon as the client disconnects.
+    """
+    db = SessionLocal()
+    try:
+        current_user = authenticate_token(token, db)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    finally:
+        db.close()
+
+    if current_user.role != "PROFESSEUR" or source not in ("recorder", "client"):
+        await websocket.close(code=1008)
+        return
+
+    try:
+        model_size = whisper_models.resolve(model_size)
+        # A live session holds one live transcription slot for its whole duration
+        live_transcription_queue.admit()
+    except HTTPException:
+        await websocket.close(code=1013)
+        return
+
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    audio_queue = asyncio.Queue()
+    stopped = asyncio.Event()
+    disconnected = asyncio.Event()
+
+    def on_frame(data: bytes, frame_channels: int, rate: int):
+        # Called from the recording thread: hand a copy over to the event loop, converted there
+        loop.call_soon_threadsafe(audio_queue.put_nowait, (bytes(data), frame_channels, rate))
+
+    async def receive_messages():
+        # Runs with either source: in recorder mode it only watches for "stop" and disconnection
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    disconnected.set()
+                    break
+                if message.get("bytes") and source == "client":
+                    audio_queue.put_nowait((message["bytes"], channels, sample_rate))
+                elif message.get("text") == "stop":
+                    break
+        finally:
+            stopped.set()
+
+    receiver = None
+    try:
+        whisper_service = await run_in_threadpool(get_whisper_service, model_size)
+        model = await run_in_threadpool(whisper_service.stt_model.get_live_model)
+        transcriber = LiveTranscriber(model, language=STT_LANGUAGE, model_lock=whisper_service.stt_model.live_model_lock)
+
+        if source == "recorder":
+            if not recorder_instance.recording:
+                await websocket.send_json({"type": "error", "detail": "No recording in progress"})
+                await websocket.close(code=1008)
+                return
+            recorder_instance.add_frame_listener(on_frame)
+        receiver = asyncio.create_task(receive_messages())
+
+        while True:
+            try:
+                transcriber.feed_pcm(*await asyncio.wait_for(audio_queue.get(), timeout=0.5))
+            except asyncio.TimeoutError:
+                pass
+            while not audio_queue.empty():
+                transcriber.feed_pcm(*audio_queue.get_nowait())
+
+            if disconnected.is_set():
+                # Nobody to send the transcript to: stop decoding now
+                raise WebSocketDisconnect()
+            finished = stopped.is_set() or (source == "recorder" and not recorder_instance.recording)
+            if finished and audio_queue.empty():
+                break
+            if transcriber.ready():
+                for event in await live_transcription_queue.run(transcriber.process):
+                    await websocket.send_json(event)
+
+        for event in await live_transcription_queue.run(transcriber.finish):
+            await websocket.send_json(event)
+        await websocket.send_json({"type": "done", "text": transcriber.text})
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("Live transcription client disconnected")
+    except Exception as e:
+        logger.error(f"Error in live transcription: {str(e)}")
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        recorder_instance.remove_frame_listener(on_frame)
+        if receiver:
+            receiver.cancel()
+        live_transcription_queue.release()
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from app.services.professeur.whisperService import WhisperService
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from app.services.professeur.whisperService import get_whisper_service, transcription_queue, live_transcription_queue, transcription_cache, whisper_models
 from app.utils.protectRoute import get_current_user
 from app.db.schemas.user import UserOutput
 
 sttRouter = APIRouter()
-whisper_service = WhisperService(model_size="base")  # Using base model for better quality
 
 @sttRouter.post("/transcribe")
 async def transcribe_audio(
     audio_file: UploadFile = File(...),
+    long_audio: Optional[bool] = Query(None, description="Split at silences and transcribe segments in parallel; automatic for long recordings by default"),
+    model_size: Optional[str] = Query(None, description="Whisper model size, e.g. tiny, base or small"),
+    quality: Optional[str] = Query(None, description="fast, balanced or accurate; ignored when model_size is given"),
     current_user: UserOutput = Depends(get_current_user)
 ):
     """
@@ -17,7 +21,9 @@ async def transcribe_audio(
     Returns:
         dict: A dictionary containing:
             - text: The transcribed text
+            - segments: Timestamped segments (start and end in seconds)
             - processing_time: Time taken to process the audio in seconds
+            - cached: Whether the result was served from the transcription cache
     """
     if not audio_file.filename:
         raise HTTPException(status_code=400, detail="No audio file provided")
@@ -26,10 +32,28 @@ async def transcribe_audio(
     if not audio_file.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Transcribe the audio
-    result = await whisper_service.transcribe_audio(audio_file)
+    # Load the model off the event loop on first use, then transcribe the audio
+    model_size = whisper_models.resolve(model_size, quality)
+    whisper_service = await run_in_threadpool(get_whisper_service, model_size)
+    result = await whisper_service.transcribe_audio(audio_file, long_audio=long_audio)
     
     return {
         "transcription": result["text"],
-        "processing_time": result["processing_time"]
-    } 
\ No newline at end of file
+        "segments": result["segments"],
+        "processing_time": result["processing_time"],
+        "cached": result["cached"],
+        "model_size": model_size
+    }
+
+@sttRouter.get("/metrics")
+def get_transcription_metrics(current_user: UserOutput = Depends(get_current_user)):
+    """Queue depth, wait and processing times of the transcription pool, and cache statistics"""
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can view transcription statistics")
+
+    return {
+        **transcription_queue.stats(),
+        "live": live_transcription_queue.stats(),
+        "cache": transcription_cache.stats(),
+        "models": whisper_models.stats()
+    }
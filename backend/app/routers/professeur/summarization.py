@@ -1,21 +1,243 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
 from typing import Optional
 from pydantic import BaseModel
-from ...services.professeur.summarization_service import summarization_service
+from datetime import datetime
+from contextlib import closing
+import json
+import logging
+from ...core.database import get_db
+from ...core.model_registry import model_registry
+from ...services.professeur.summarization_service import get_summarization_service
+from ...services.professeur.summarization_job_service import SummarizationJobService
+from ...services.professeur.generation_profiles import GENERATION_PROFILES, DEFAULT_GENERATION_PROFILE
 from ...utils.protectRoute import get_current_user
+from ...db.schemas.user import UserOutput
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson"
+}
+
 class SummarizationRequest(BaseModel):
     text: str
+    # Token budget of the extractive pre-reduction; None uses the server default, 0 disables it
+    extractive_budget: Optional[int] = None
+    # Generation profile: "fast", "balanced" or "quality"; None uses the server default
+    profile: Optional[str] = None
+    # Target generation time in seconds, used to pick a profile when none is given
+    latency_budget: Optional[float] = None
+    # Return an extractive draft right away and generate the full summary in a background job
+    draft: bool = False
+
+class SummarizationJobResponse(BaseModel):
+    id: int
+    status: str
+    cours_id: Optional[int] = None
+    progress_current: int
+    progress_total: int
+    error: Optional[str] = None
+    time_inserted: datetime
+    time_started: Optional[datetime] = None
+    time_finished: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+def validate_generation_options(request: SummarizationRequest):
+    if request.profile is not None and request.profile not in GENERATION_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"profile must be one of: {', '.join(GENERATION_PROFILES)}"
+        )
+    if request.latency_budget is not None and request.latency_budget <= 0:
+        raise HTTPException(status_code=400, detail="latency_budget must be a positive number of seconds")
 
 @router.post("/summarization")
 async def summarize_text(
     request: SummarizationRequest,
-    current_user: dict = Depends(get_current_user)
+    db: Session = Depends(get_db),
+    current_user: UserOutput = Depends(get_current_user)
 ):
+    validate_generation_options(request)
+    if request.draft:
+        return await summarize_draft(request, db, current_user)
     try:
-        summary = summarization_service.summarize_text(request.text)
-        return {"summary": summary}
+        # Load the model and run the blocking call off the event loop
+        summary = await run_in_threadpool(lambda: get_summarization_service().summarize_text(
+            request.text,
+            extractive_budget=request.extractive_budget,
+            profile=request.profile,
+            latency_budget=request.latency_budget
+        ))
+        return {"summary": summary, "status": "final"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def summarize_draft(request: SummarizationRequest, db: Session, current_user: UserOutput) -> dict:
+    """
+    Extractive draft now, full summary later.
+
+    The full summary is computed by a summarization job; its id is returned so
+    the client can poll it, or pass it as `refine_job_id` when creating the
+    course so the final summary replaces the draft in `Cours.summary`.
+    """
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can request draft summaries")
+
+    # Draft first: if it fails, no full-quality job is left running with nothing referencing it
+    try:
+        draft = await run_in_threadpool(lambda: get_summarization_service().draft_summary(request.text))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # The submission commits to the database: keep it off the event loop too
+    job = await run_in_threadpool(lambda: SummarizationJobService(db).submit_job(
+        request.text,
+        current_user.id,
+        request.extractive_budget,
+        profile=request.profile,
+        latency_budget=request.latency_budget
+    ))
+    return {"summary": draft, "status": "draft", "job_id": job.id}
+
+def format_summary_event(event: dict, stream_format: str) -> str:
+    payload = json.dumps(event, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event['event']}\ndata: {payload}\n\n"
+    return f"{payload}\n"
+
+@router.post("/summarization/stream")
+def stream_summarization(
+    request: SummarizationRequest,
+    stream_format: str = Query("sse", alias="format", description="Event framing: sse or ndjson"),
+    current_user: UserOutput = Depends(get_current_user)
+):
+    """Stream chunk summaries as they are generated, then the final summary"""
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    if not request.text or not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text to summarize is empty")
+    validate_generation_options(request)
+
+    def event_stream():
+        # Starlette iterates this sync generator in its threadpool, off the event loop.
+        # Chunks go through the batching scheduler and are streamed as each one completes
+        events = get_summarization_service().iter_summary_events(
+            request.text,
+            extractive_budget=request.extractive_budget,
+            profile=request.profile,
+            latency_budget=request.latency_budget
+        )
+        # Closing the event generator when the client goes away stops the remaining generations
+        with closing(events):
+            try:
+                for event in events:
+                    yield format_summary_event(event, stream_format)
+            except Exception as e:
+                logger.error(f"Error while streaming summary: {str(e)}")
+                yield format_summary_event({"event": "error", "detail": str(e)}, stream_format)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/summarization/cache/stats")
+def get_summary_cache_stats(current_user: UserOutput = Depends(get_current_user)):
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can view summarization statistics")
+
+    service = model_registry.get_if_loaded("summarization")
+    if service is None:
+        return {"enabled": None, "detail": "Summarization model is not loaded yet"}
+    return service.summary_cache.stats()
+
+@router.get("/summarization/metrics")
+def get_summarization_metrics(current_user: UserOutput = Depends(get_current_user)):
+    """Batch-size and queue-wait histograms of the cross-request batching scheduler"""
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can view summarization statistics")
+
+    service = model_registry.get_if_loaded("summarization")
+    if service is None:
+        return {"enabled": None, "detail": "Summarization model is not loaded yet"}
+    if service.scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **service.scheduler.stats()}
+
+@router.get("/summarization/profiles")
+def get_generation_profiles(current_user: UserOutput = Depends(get_current_user)):
+    """Available generation profiles with their measured decoding speed"""
+    profiles = {
+        name: {"num_beams": profile.num_beams, "min_tokens": profile.min_tokens, "min_ratio": profile.min_ratio}
+        for name, profile in GENERATION_PROFILES.items()
+    }
+    service = model_registry.get_if_loaded("summarization")
+    if service is not None:
+        for name, throughput in service.throughput.stats().items():
+            profiles[name].update(throughput)
+    return {"default": DEFAULT_GENERATION_PROFILE, "profiles": profiles}
+
+@router.post("/summarization/jobs", response_model=SummarizationJobResponse, status_code=202)
+def submit_summarization_job(
+    request: SummarizationRequest,
+    db: Session = Depends(get_db),
+    current_user: UserOutput = Depends(get_current_user)
+):
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can submit summarization jobs")
+
+    validate_generation_options(request)
+    return SummarizationJobService(db).submit_job(
+        request.text,
+        current_user.id,
+        request.extractive_budget,
+        profile=request.profile,
+        latency_budget=request.latency_budget
+    )
+
+@router.get("/summarization/jobs/{job_id}", response_model=SummarizationJobResponse)
+def get_summarization_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserOutput = Depends(get_current_user)
+):
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can view summarization jobs")
+
+    return SummarizationJobService(db).get_job(job_id, current_user.id)
+
+@router.get("/summarization/jobs/{job_id}/result")
+def get_summarization_job_result(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserOutput = Depends(get_current_user)
+):
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can view summarization jobs")
+
+    job = SummarizationJobService(db).get_job(job_id, current_user.id)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}, no result available")
+    return {"summary": job.summary}
+
+@router.delete("/summarization/jobs/{job_id}", response_model=SummarizationJobResponse)
+def cancel_summarization_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserOutput = Depends(get_current_user)
+):
+    if current_user.role != "PROFESSEUR":
+        raise HTTPException(status_code=403, detail="Only professors can cancel summarization jobs")
+
+    return SummarizationJobService(db).cancel_job(job_id, current_user.id)
@@ -0,0 +1,163 @@
+from collections import deque
+import numpy as np
+
+FULL_SCALE = 32767.0
+ZERO = np.float32(0)
+ONE = np.float32(1)
+
+class AudioMixer:
+    """
+    Mix system audio and microphone blocks of 16-bit PCM on the capture thread.
+
+    Each source is scaled by its own gain and summed in float32, so loud sources
+    never wrap around the way int16 addition does. Peaks above
+    `limiter_threshold` (a fraction of full scale) are compressed smoothly
+    towards full scale instead of being clipped flat; below it the
+    mix is an exact sum. With unity gains, a block whose sum stays under the
+    threshold (the usual case) is summed in int32 and written out directly,
+    skipping the float and limiter work. All intermediate and output buffers
+    are allocated once and reused, so mixing a block allocates no sample data
+    (only small array views).
+
+    `mix` returns a memoryview of one of `output_buffers` preallocated output
+    buffers, which the consumer keeps without copying until it hands it back
+    with `release` (the WAV writer does once the block is on disk). A new
+    buffer is allocated only when all of them are still held.
+    """
+
+    def __init__(
+        self,
+        gains: tuple = (1.0, 1.0),
+        limiter_threshold: float = 0.8,
+        block_samples: int = 2048,
+        output_buffers: int = 1
+    ):
+        if not 0 < limiter_threshold < 1:
+            raise ValueError("limiter_threshold must be between 0 and 1")
+        self.gains = tuple(np.float32(gain) for gain in gains)
+        self.unity = all(gain == 1 for gain in self.gains)
+        self.threshold = np.float32(limiter_threshold * FULL_SCALE)
+        self.knee = np.float32(FULL_SCALE - self.threshold)
+        self.output_buffers = max(1, output_buffers)
+        # Released from the consumer's thread: deque appends and pops are atomic
+        self._free = deque()
+        self._allocate(block_samples)
+
+    def _allocate(self, samples: int):
+        self._sum = np.zeros(samples, dtype=np.float32)
+        self._scaled = np.zeros(samples, dtype=np.float32)
+        self._excess = np.zeros(samples, dtype=np.float32)
+        # Int32 sum and scratch buffers for the unity-gain path
+        self._wide = (np.zeros(samples, dtype=np.int32), np.zeros(samples, dtype=np.int32))
+        # id(output array) -> (array, byte view); buffers of a previous size are never reused
+        self._outputs = {}
+        self._free.clear()
+        for _ in range(self.output_buffers):
+            self._free.append(self._new_output(samples))
+
+    def _new_output(self, samples: int) -> tuple:
+        output = np.zeros(samples, dtype=np.int16)
+        entry = (output, memoryview(output).cast("B"))
+        self._outputs[id(output)] = entry
+        return entry
+
+    def _buffers(self, n: int) -> tuple:
+        if n > len(self._sum):
+            self._allocate(n)
+        try:
+            output, output_bytes = self._free.popleft()
+        except IndexError:
+            output, output_bytes = self._new_output(len(self._sum))
+        if n == len(self._sum):
+            return self._sum, self._scaled, self._excess, self._wide, output, output_bytes
+        return self._sum[:n], self._scaled[:n], self._excess[:n], tuple(wide[:n] for wide in self._wide), output[:n], output_bytes[:n * 2]
+
+    def release(self, block: memoryview):
+        """Hand back a block returned by `mix` once its consumer is done with it; call once per block"""
+        entry = self._outputs.get(id(block.obj))
+        if entry is not None:
+            self._free.append(entry)
+
+    def mix(self, system: bytes, microphone: bytes) -> memoryview:
+        """
+        Mix a block of system audio and a block of microphone audio into a free output buffer.
+
+        Blocks are interleaved int16 bytes in the same format, or None for a
+        missing source; a longer block is cut to the shorter one.
+        """
+        if system is None and microphone is None:
+            return memoryview(b"")
+        if system is None or microphone is None:
+            gain = self.gains[1] if system is None else self.gains[0]
+            array = np.frombuffer(microphone if system is None else system, dtype=np.int16)
+            n = len(array)
+            total, scaled, excess, wide, output, output_bytes = self._buffers(n)
+            peaked = False
+            if gain == 1:
+                # Widened first: abs wraps -32768 around in int16
+                np.copyto(wide[0], array)
+                if self._under_threshold(wide[0], wide[0]):
+                    np.copyto(output, array)
+                    return output_bytes
+                peaked = True
+            # Explicit widening copies: mixed int16/float32 ufuncs would allocate casting buffers
+            np.copyto(total, array)
+            exact = self._scale(total, gain)
+        else:
+            system_array = np.frombuffer(system, dtype=np.int16)
+            microphone_array = np.frombuffer(microphone, dtype=np.int16)
+            n = min(len(system_array), len(microphone_array))
+            total, scaled, excess, wide, output, output_bytes = self._buffers(n)
+            system_array = system_array if len(system_array) == n else system_array[:n]
+            microphone_array = microphone_array if len(microphone_array) == n else microphone_array[:n]
+            peaked = False
+            if self.unity:
+                # An int32 sum cannot wrap, and is exact; both operands are widened
+                # first, as a mixed int16/int32 add would allocate casting buffers
+                wide_sum, wide_other = wide
+                np.copyto(wide_sum, system_array)
+                np.copyto(wide_other, microphone_array)
+                np.add(wide_sum, wide_other, out=wide_sum)
+                if self._under_threshold(wide_sum, wide_other):
+                    np.copyto(output, wide_sum, casting="unsafe")
+                    return output_bytes
+                np.copyto(total, wide_sum)
+                exact = peaked = True
+            else:
+                np.copyto(total, system_array)
+                np.copyto(scaled, microphone_array)
+                exact = self._scale(total, self.gains[0]) & self._scale(scaled, self.gains[1])
+                np.add(total, scaled, out=total)
+
+        np.abs(total, out=excess)
+        if peaked or np.maximum.reduce(excess) > self.threshold:
+            # Soft limiter: the excess e = |x| - threshold becomes e / (1 + e / knee),
+            # which leaves the slope unchanged at the threshold and never reaches full scale
+            np.subtract(excess, self.threshold, out=excess)
+            np.maximum(excess, ZERO, out=excess)
+            np.divide(excess, self.knee, out=scaled)
+            np.add(scaled, ONE, out=scaled)
+            np.divide(excess, scaled, out=scaled)
+            # Remove e - e / (1 + e / knee) from the magnitude of each sample
+            np.subtract(excess, scaled, out=excess)
+            np.copysign(excess, total, out=excess)
+            np.subtract(total, excess, out=total)
+            exact = False
+
+        if not exact:
+            np.rint(total, out=total)
+        np.copyto(output, total, casting="unsafe")
+        return output_bytes
+
+    def _under_threshold(self, samples: np.ndarray, magnitudes: np.ndarray) -> bool:
+        """Whether no magnitude of the int32 `samples` exceeds the limiter threshold; `magnitudes` is overwritten"""
+        np.abs(samples, out=magnitudes)
+        return not len(magnitudes) or np.maximum.reduce(magnitudes) <= self.threshold
+
+    @staticmethod
+    def _scale(samples: np.ndarray, gain) -> bool:
+        """Apply a gain in place; returns whether the samples are still whole numbers"""
+        if gain == 1:
+            return True
+        np.multiply(samples, gain, out=samples)
+        return False
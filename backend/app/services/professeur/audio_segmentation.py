@@ -0,0 +1,50 @@
+import numpy as np
+
+def frame_rms(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """Root mean square energy of consecutive non-overlapping frames"""
+    n_frames = len(samples) // frame_size
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_size].reshape(n_frames, frame_size).astype(np.float32)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+def split_at_silences(
+    samples: np.ndarray,
+    sample_rate: int,
+    min_seconds: float = 30,
+    max_seconds: float = 120,
+    frame_seconds: float = 0.03,
+    smoothing_seconds: float = 0.3
+) -> list:
+    """
+    Split mono audio into (start, end) sample ranges of `min_seconds` to `max_seconds`.
+
+    Each cut is placed at the quietest point of the allowed window, measured
+    on frame energy smoothed over `smoothing_seconds`, so segments end in a
+    pause rather than mid-word. The last segment is kept at least
+    `min_seconds` long whenever the audio allows it.
+    """
+    total = len(samples)
+    if total <= max_seconds * sample_rate:
+        return [(0, total)]
+
+    frame_size = max(1, int(sample_rate * frame_seconds))
+    energy = frame_rms(samples, frame_size)
+    window = max(1, int(smoothing_seconds / frame_seconds))
+    energy = np.convolve(energy, np.ones(window, dtype=np.float32) / window, mode="same")
+
+    n_frames = len(energy)
+    min_frames = max(1, int(min_seconds * sample_rate / frame_size))
+    max_frames = max(min_frames + 1, int(max_seconds * sample_rate / frame_size))
+
+    cuts = []
+    start = 0
+    while n_frames - start > max_frames:
+        lower = start + min_frames
+        upper = max(lower + 1, min(start + max_frames, n_frames - min_frames))
+        cut = lower + int(np.argmin(energy[lower:upper]))
+        cuts.append(cut * frame_size)
+        start = cut
+
+    bounds = [0] + cuts + [total]
+    return list(zip(bounds[:-1], bounds[1:]))
@@ -0,0 +1,123 @@
+from concurrent.futures import Future
+from bisect import bisect_left
+import logging
+import queue
+import threading
+import time
+
+class BatchingScheduler:
+    """
+    Collect work items from concurrent callers and run them as shared batches.
+
+    Callers `submit(key, payload)` and wait on the returned Future. A single
+    worker thread takes the oldest item, keeps collecting items with the same
+    key for at most `max_wait_ms` or until `max_batch_size` are gathered, then
+    calls `run_batch(key, payloads)`. `run_batch` must return one result per
+    payload, in order. Items with different keys are never batched together;
+    they are held and served by the following batches. Futures cancelled by
+    their caller before their batch starts are dropped from it.
+    """
+
+    QUEUE_WAIT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    def __init__(self, run_batch, max_batch_size: int = 8, max_wait_ms: float = 20, name: str = "batching-scheduler"):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self._held = []
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = {}
+        self._queue_wait_counts = [0] * (len(self.QUEUE_WAIT_BUCKETS_MS) + 1)
+        self._queue_wait_total_ms = 0.0
+        self._items = 0
+        self._batches = 0
+
+    def submit(self, key, payload) -> Future:
+        self._ensure_started()
+        future = Future()
+        self._queue.put((key, payload, future, time.monotonic()))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self, held: list) -> list:
+        """Gather one batch of items sharing a key; items with other keys are held for later batches"""
+        first = held.pop(0) if held else self._queue.get()
+        batch = [first]
+        for item in list(held):
+            if len(batch) >= self.max_batch_size:
+                break
+            if item[0] == first[0]:
+                held.remove(item)
+                batch.append(item)
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item[0] == first[0]:
+                batch.append(item)
+            else:
+                held.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            # Futures cancelled while queued are dropped; the others can no longer be cancelled
+            batch = [item for item in self._collect(self._held) if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            self._record(len(batch), [(started - item[3]) * 1000 for item in batch])
+            try:
+                results = self.run_batch(batch[0][0], [item[1] for item in batch])
+            except Exception as e:
+                logging.error(f"Error in {self.name} batch of {len(batch)} items: {str(e)}")
+                for item in batch:
+                    item[2].set_exception(e)
+                continue
+            for item, result in zip(batch, results):
+                item[2].set_result(result)
+
+    def _record(self, batch_size: int, waits_ms: list):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += batch_size
+            self._batch_sizes[batch_size] = self._batch_sizes.get(batch_size, 0) + 1
+            for wait_ms in waits_ms:
+                self._queue_wait_counts[bisect_left(self.QUEUE_WAIT_BUCKETS_MS, wait_ms)] += 1
+                self._queue_wait_total_ms += wait_ms
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            wait_histogram = {
+                f"le_{bound}ms": count
+                for bound, count in zip(self.QUEUE_WAIT_BUCKETS_MS, self._queue_wait_counts)
+            }
+            wait_histogram["gt_max"] = self._queue_wait_counts[-1]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize() + len(self._held),
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+                "mean_queue_wait_ms": round(self._queue_wait_total_ms / self._items, 3) if self._items else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "queue_wait_histogram": wait_histogram
+            }
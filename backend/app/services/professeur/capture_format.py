@@ -0,0 +1,77 @@
+import numpy as np
+
+# Formats a recording can be saved in: "whisper" is what speech recognition consumes as is
+CAPTURE_PROFILES = {
+    "studio": {"rate": 44100, "channels": 2},
+    "whisper": {"rate": 16000, "channels": 1}
+}
+
+# Format the capture devices are opened with when they cannot deliver the profile format directly
+DEVICE_RATE = 44100
+DEVICE_CHANNELS = 2
+
+def pcm16_to_mono(data: bytes, channels: int) -> np.ndarray:
+    """Interleaved 16-bit PCM to mono float32 in [-1, 1]"""
+    samples = np.frombuffer(data, dtype=np.int16)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32) / 32768.0
+
+def lowpass_taps(cutoff: float, rate: int, n_taps: int = 63) -> np.ndarray:
+    """Hamming-windowed sinc low-pass filter, unit gain at DC"""
+    n = np.arange(n_taps) - (n_taps - 1) / 2
+    taps = np.sinc(2 * cutoff / rate * n) * np.hamming(n_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+class PcmStreamConverter:
+    """
+    Convert a stream of interleaved 16-bit PCM blocks to another rate and channel count.
+
+    Channels are averaged down to mono, then the audio is low-pass filtered
+    below the new Nyquist frequency and linearly interpolated. The filter
+    history and the fractional read position carry over from one block to
+    the next, so block boundaries leave no clicks and the output length
+    tracks the input duration exactly over a whole recording.
+    """
+
+    def __init__(self, in_rate: int, in_channels: int, out_rate: int, out_channels: int = 1):
+        if out_channels != 1:
+            raise ValueError("Only conversion to mono is supported")
+        self.in_rate = in_rate
+        self.in_channels = in_channels
+        self.out_rate = out_rate
+        self.step = in_rate / out_rate
+        self._taps = lowpass_taps(0.45 * out_rate, in_rate) if out_rate < in_rate else None
+        self._history = np.zeros(len(self._taps) - 1 if self._taps is not None else 0, dtype=np.float32)
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._position = 0.0
+
+    def convert(self, data: bytes) -> bytes:
+        samples = self.convert_float(data)
+        return np.clip(np.round(samples * 32768.0), -32768, 32767).astype(np.int16).tobytes()
+
+    def convert_float(self, data: bytes) -> np.ndarray:
+        """Convert a block to mono float32 in [-1, 1], as speech recognition consumes it"""
+        samples = pcm16_to_mono(data, self.in_channels)
+        if self.in_rate != self.out_rate:
+            samples = self._resample(samples)
+        return samples
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        if self._taps is not None:
+            extended = np.concatenate([self._history, samples])
+            self._history = extended[len(extended) - len(self._history):]
+            samples = np.convolve(extended, self._taps, mode="valid").astype(np.float32)
+
+        # The last input sample of the previous block anchors interpolation across the boundary
+        buffer = np.concatenate([self._carry, samples])
+        if len(buffer) < 2:
+            self._carry = buffer
+            return np.zeros(0, dtype=np.float32)
+        last = len(buffer) - 1
+        count = int(np.floor((last - self._position) / self.step)) + 1 if self._position <= last else 0
+        positions = self._position + np.arange(count, dtype=np.float64) * self.step
+        output = np.interp(positions, np.arange(len(buffer)), buffer).astype(np.float32)
+        self._position = self._position + count * self.step - last
+        self._carry = buffer[last:]
+        return output
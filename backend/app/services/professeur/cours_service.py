@@ -1,8 +1,14 @@
 from sqlalchemy.orm import Session
 from app.db.models.cours import Cours
+from app.db.models.cours_chunk import CoursChunk
+from app.services.professeur.summarization_service import get_summarization_service
+from app.services.professeur.summarization_job_service import SummarizationJobService, store_chunk_state
 from typing import Optional
 from app.core.database import Base
 from fastapi import HTTPException
+import logging
+
+logger = logging.getLogger(__name__)
 
 class CoursService:
     def __init__(self, db: Session):
@@ -14,8 +20,13 @@ class CoursService:
         name: str,
         transcription: str,
         summary: str,
-        professeur_id: int
+        professeur_id: int,
+        refine_job_id: Optional[int] = None
     ) -> Cours:
+        # Validate the refinement job first: a rejected job must not leave a course behind
+        job_service = SummarizationJobService(self.db)
+        job = job_service.get_refinement_job(refine_job_id, professeur_id) if refine_job_id is not None else None
+
         cours = Cours(
             module_id=module_id,  # Fixed: was using undefined 'module' instead of 'module_id'
             name=name,
@@ -23,8 +34,15 @@ class CoursService:
             summary=summary,
             professeur_id=professeur_id
         )
+        # The summary was just produced: keep its chunks so the first edit only regenerates what changed
+        store_chunk_state(cours)
         self.db.add(cours)
-        self.db.commit()
+        if job is not None:
+            # The course id is needed for the link; both are committed together
+            self.db.flush()
+            job_service.attach_to_cours(job, cours)
+        else:
+            self.db.commit()
         self.db.refresh(cours)
         return cours
 
@@ -43,6 +61,8 @@ class CoursService:
         if not cours:
             raise HTTPException(status_code=404, detail="Course not found")
         
+        previous_transcription = cours.transcription
+
         # Update only the fields that are provided
         if cours_update.get('name') is not None:
             cours.name = cours_update['name']
@@ -52,6 +72,15 @@ class CoursService:
             cours.transcription = cours_update['transcription']
         if cours_update.get('summary') is not None:
             cours.summary = cours_update['summary']
+            cours.summary_status = "final"
+        elif cours_update.get('resummarize') and cours.transcription:
+            self.resummarize_cours(cours, previous_transcription)
+            previous_transcription = cours.transcription
+
+        if cours.transcription != previous_transcription:
+            # Chunk offsets point into the old transcription: drop them rather than
+            # let the next incremental re-summarization slice the wrong text
+            cours.chunks = []
         
         try:
             self.db.commit()
@@ -61,6 +90,40 @@ class CoursService:
             self.db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
+    def resummarize_cours(self, cours: Cours, previous_transcription: Optional[str]) -> None:
+        """Refresh the course summary, regenerating only the chunks whose text changed"""
+        previous_chunks = [
+            {
+                "start": chunk.start_char,
+                "end": chunk.end_char,
+                "chunk_hash": chunk.chunk_hash,
+                "summary": chunk.summary
+            }
+            for chunk in cours.chunks
+        ]
+        summary, chunk_states, stats = get_summarization_service().summarize_incremental(
+            cours.transcription,
+            previous_text=previous_transcription,
+            previous_chunks=previous_chunks
+        )
+
+        cours.summary = summary
+        cours.summary_status = "final"
+        cours.chunks = [
+            CoursChunk(
+                position=position,
+                start_char=state["start"],
+                end_char=state["end"],
+                chunk_hash=state["chunk_hash"],
+                summary=state["summary"]
+            )
+            for position, state in enumerate(chunk_states)
+        ]
+        logger.info(
+            f"Re-summarized course {cours.id}: {stats['reused']} chunks reused, "
+            f"{stats['generated']} generated"
+        )
+
     def delete_cours(self, cours_id: int, professeur_id: int) -> None:
         cours = self.db.query(Cours).filter(
             Cours.id == cours_id,
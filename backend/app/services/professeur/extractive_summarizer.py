@@ -0,0 +1,100 @@
+import numpy as np
+import logging
+import re
+from app.services.professeur.text_chunker import split_sentences
+
+_WORD = re.compile(r"[a-zàâäçéèêëîïôöùûüÿœæ0-9]+(?:['’-][a-zàâäçéèêëîïôöùûüÿœæ0-9]+)*")
+
+FRENCH_STOPWORDS = frozenset("""
+a à ai aie aient aies ait alors as au aucun aura aurai auraient aurais aurait aux avaient avais avait
+avant avec avez aviez avions avoir avons ayant bah ben bien bon c ça car ce ceci cela celle celles celui
+ces cet cette ceux chaque ci comme comment d dans de des donc dont du elle elles en encore est et étaient
+étais était été être eu eux euh fait faire fois font hein hum il ils j je jusqu l la là le les leur
+leurs lui m ma mais me même mes moi mon n ne ni non nos notre nous o on ont ou où oui par parce pas
+peu peut plus pour pourquoi qu quand que quel quelle quelles quels qui quoi s sa sans se sera ses si
+sien son sont sous sur t ta te tes toi ton tous tout toute toutes très tu un une vers voici voilà vos
+votre vous vraiment y enfin ok okay bref genre va vais vont voir dire dit faut aller truc chose
+""".split())
+
+def sentence_scores(sentences: list) -> np.ndarray:
+    """
+    Centroid TF-IDF score of every sentence, fully vectorized.
+
+    Each sentence is a TF-IDF vector over content words; its score is the cosine
+    similarity with the mean vector of the whole transcript, so sentences that
+    carry the main vocabulary of the lecture rank first.
+    """
+    vocabulary = {}
+    rows = []
+    cols = []
+    for row, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            if word in FRENCH_STOPWORDS or len(word) < 2:
+                continue
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    n_sentences = len(sentences)
+    if not cols:
+        return np.zeros(n_sentences, dtype=np.float32)
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    n_terms = len(vocabulary)
+
+    # One entry per distinct (sentence, term) pair with its count
+    pairs, counts = np.unique(rows * n_terms + cols, return_counts=True)
+    pair_rows = pairs // n_terms
+    pair_cols = pairs % n_terms
+
+    document_frequency = np.bincount(pair_cols, minlength=n_terms).astype(np.float32)
+    idf = np.log((1 + n_sentences) / (1 + document_frequency)) + 1
+
+    # Raw counts keep short sentences from dominating the transcript centroid
+    weights = counts * idf[pair_cols]
+    centroid = np.bincount(pair_cols, weights=weights, minlength=n_terms) / n_sentences
+
+    dots = np.bincount(pair_rows, weights=weights * centroid[pair_cols], minlength=n_sentences)
+    norms = np.sqrt(np.bincount(pair_rows, weights=weights ** 2, minlength=n_sentences))
+    centroid_norm = np.linalg.norm(centroid)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(norms > 0, dots / (norms * centroid_norm), 0.0)
+    return scores.astype(np.float32)
+
+def reduce_to_token_budget(text: str, token_budget: int, count_tokens) -> str:
+    """
+    Keep the highest scoring sentences of `text` within `token_budget` tokens.
+
+    `count_tokens(sentences)` must return the token count of each sentence.
+    Exact repeats are dropped, and the kept sentences stay in their original
+    order so the abstractive model still reads a coherent lecture.
+    """
+    spans = split_sentences(text)
+    sentences = [text[start:end].strip() for start, end in spans]
+    if not sentences:
+        return text
+
+    token_counts = np.asarray(count_tokens(sentences), dtype=np.int64)
+    if token_counts.sum() <= token_budget:
+        return text
+
+    scores = sentence_scores(sentences)
+    seen = set()
+    selected = []
+    used_tokens = 0
+    for index in np.argsort(-scores, kind="stable"):
+        normalized = " ".join(sentences[index].lower().split())
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        if scores[index] <= 0 or used_tokens + token_counts[index] > token_budget:
+            continue
+        selected.append(index)
+        used_tokens += token_counts[index]
+
+    selected.sort()
+    logging.info(
+        f"Extractive stage kept {len(selected)}/{len(sentences)} sentences, "
+        f"{used_tokens}/{int(token_counts.sum())} tokens"
+    )
+    return " ".join(sentences[index] for index in selected)
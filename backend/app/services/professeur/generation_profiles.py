@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+import os
+import threading
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Decoding settings of one speed/quality trade-off"""
+    name: str
+    num_beams: int
+    min_tokens: int
+    min_ratio: float
+    max_tokens: int
+    max_ratio: float
+    no_repeat_ngram_size: int = 3
+    length_penalty: float = 1.0
+
+    def length_range(self, input_tokens: int) -> tuple:
+        min_summary_tokens = max(self.min_tokens, int(input_tokens * self.min_ratio))
+        max_summary_tokens = min(self.max_tokens, int(input_tokens * self.max_ratio))
+        return min_summary_tokens, max_summary_tokens
+
+    def cache_params(self) -> dict:
+        return {
+            "profile": self.name,
+            "num_beams": self.num_beams,
+            "no_repeat_ngram_size": self.no_repeat_ngram_size,
+            "length_penalty": self.length_penalty,
+            "min_tokens": self.min_tokens,
+            "min_ratio": self.min_ratio,
+            "max_tokens": self.max_tokens,
+            "max_ratio": self.max_ratio
+        }
+
+# Ordered from the cheapest to the most expensive
+GENERATION_PROFILES = {
+    "fast": GenerationProfile("fast", num_beams=1, min_tokens=30, min_ratio=0.1, max_tokens=256, max_ratio=0.4),
+    "balanced": GenerationProfile("balanced", num_beams=3, min_tokens=60, min_ratio=0.2, max_tokens=512, max_ratio=0.5),
+    "quality": GenerationProfile("quality", num_beams=6, min_tokens=100, min_ratio=0.3, max_tokens=1000, max_ratio=0.7)
+}
+
+DEFAULT_GENERATION_PROFILE = os.getenv("SUMMARIZATION_DEFAULT_PROFILE", "quality")
+
+# Decoding speed assumed for greedy search before anything has been measured
+SUMMARIZATION_ASSUMED_TOKENS_PER_SECOND = float(os.getenv("SUMMARIZATION_ASSUMED_TOKENS_PER_SECOND", "40"))
+
+def get_generation_profile(name=None) -> GenerationProfile:
+    """Resolve a profile name (or None for the default) to its settings"""
+    if isinstance(name, GenerationProfile):
+        return name
+    name = name or DEFAULT_GENERATION_PROFILE
+    if name not in GENERATION_PROFILES:
+        raise ValueError(f"Unknown generation profile '{name}', expected one of {', '.join(GENERATION_PROFILES)}")
+    return GENERATION_PROFILES[name]
+
+class ThroughputTracker:
+    """
+    Measured decoding speed of every generation profile.
+
+    Speed is counted in decoding steps per second of a generate call, i.e. the
+    output tokens of one sequence, which is what a single request waits on.
+    Profiles that were never measured are estimated from the measured ones,
+    assuming the cost of a step grows linearly with the number of beams.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self._tokens_per_second = {}
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, profile: GenerationProfile, output_tokens: int, seconds: float):
+        if output_tokens <= 0 or seconds <= 0:
+            return
+        rate = output_tokens / seconds
+        with self._lock:
+            previous = self._tokens_per_second.get(profile.name)
+            self._tokens_per_second[profile.name] = rate if previous is None else (
+                self.smoothing * rate + (1 - self.smoothing) * previous
+            )
+            self._samples[profile.name] = self._samples.get(profile.name, 0) + 1
+
+    def tokens_per_second(self, profile: GenerationProfile) -> float:
+        with self._lock:
+            measured = self._tokens_per_second.get(profile.name)
+            if measured is not None:
+                return measured
+            # Greedy-equivalent speed of the other profiles, scaled to this beam count
+            greedy_rates = [
+                rate * GENERATION_PROFILES[name].num_beams
+                for name, rate in self._tokens_per_second.items()
+            ]
+        greedy_rate = sum(greedy_rates) / len(greedy_rates) if greedy_rates else SUMMARIZATION_ASSUMED_TOKENS_PER_SECOND
+        return greedy_rate / profile.num_beams
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "num_beams": profile.num_beams,
+                "tokens_per_second": round(self.tokens_per_second(profile), 2),
+                "measured": name in self._tokens_per_second,
+                "samples": self._samples.get(name, 0)
+            }
+            for name, profile in GENERATION_PROFILES.items()
+        }
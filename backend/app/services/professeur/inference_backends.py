@@ -0,0 +1,167 @@
+"""
+CPU inference engines for the seq2seq summarization model.
+
+The engine is selected with the SUMMARIZATION_BACKEND environment variable:
+    - "torch":      full precision PyTorch (default)
+    - "torch-int8": PyTorch with dynamic int8 quantization of the Linear layers
+    - "onnx":       ONNX Runtime graph exported with `optimum`
+                    (optional dependency: pip install "optimum[onnxruntime]")
+
+Run `python -m app.services.professeur.inference_backends --help` from the
+backend directory to compare the outputs of several engines on the same text.
+"""
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from abc import ABC, abstractmethod
+from difflib import SequenceMatcher
+import argparse
+import json
+import logging
+import os
+import time
+import torch
+
+class InferenceBackend(ABC):
+    name = None
+
+    def __init__(self, model_name: str, cache_dir: str):
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.device = torch.device("cpu")
+        self.model = None
+
+    @abstractmethod
+    def load(self):
+        """Load the model; returns the backend"""
+
+    def generate(self, input_ids, attention_mask, **generate_kwargs):
+        with torch.inference_mode():
+            return self.model.generate(input_ids, attention_mask=attention_mask, **generate_kwargs)
+
+class TorchBackend(InferenceBackend):
+    name = "torch"
+
+    def load(self):
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name, cache_dir=self.cache_dir)
+        self.model.eval()
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.model.to(self.device)
+        return self
+
+class QuantizedTorchBackend(InferenceBackend):
+    name = "torch-int8"
+
+    def load(self):
+        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name, cache_dir=self.cache_dir)
+        model.eval()
+        # Dynamic quantization only targets CPU kernels: weights are int8, activations quantized on the fly
+        self.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.device = torch.device("cpu")
+        return self
+
+class OnnxRuntimeBackend(InferenceBackend):
+    name = "onnx"
+
+    def load(self):
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise RuntimeError(
+                "The onnx summarization backend requires optimum: pip install \"optimum[onnxruntime]\""
+            )
+
+        export_dir = os.path.join(self.cache_dir, "onnx", self.model_name.replace("/", "--"))
+        if os.path.exists(os.path.join(export_dir, "config.json")):
+            self.model = ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+        else:
+            logging.info(f"Exporting {self.model_name} to ONNX in {export_dir}")
+            self.model = ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True, cache_dir=self.cache_dir)
+            self.model.save_pretrained(export_dir)
+        self.device = torch.device("cpu")
+        return self
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TorchBackend, QuantizedTorchBackend, OnnxRuntimeBackend)
+}
+
+def create_backend(name: str, model_name: str, cache_dir: str) -> InferenceBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown summarization backend '{name}'. Options: {', '.join(BACKENDS)}")
+
+    start_time = time.time()
+    backend = BACKENDS[name](model_name, cache_dir).load()
+    logging.info(f"Summarization backend '{name}' loaded in {time.time() - start_time:.2f} seconds")
+    return backend
+
+def check_backend_parity(
+    texts: list,
+    backend_names: list,
+    model_name: str,
+    cache_dir: str,
+    num_beams: int = 6,
+    max_length: int = 256
+) -> dict:
+    """
+    Summarize the same texts with several backends and compare them to the first one.
+
+    Returns per-backend latency and, for every text, the summary and its
+    token-level similarity (1.0 means identical) to the reference backend.
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir)
+    tokenizer.model_max_length = 1024
+    reference_name = backend_names[0]
+    report = {"reference": reference_name, "backends": {}}
+    outputs = {}
+
+    for name in backend_names:
+        backend = create_backend(name, model_name, cache_dir)
+        summaries = []
+        elapsed = 0.0
+        for text in texts:
+            inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=tokenizer.model_max_length)
+            start_time = time.time()
+            summary_ids = backend.generate(
+                inputs["input_ids"].to(backend.device),
+                inputs["attention_mask"].to(backend.device),
+                num_beams=num_beams,
+                no_repeat_ngram_size=3,
+                early_stopping=True,
+                max_length=max_length,
+                do_sample=False
+            )
+            elapsed += time.time() - start_time
+            summaries.append(tokenizer.decode(summary_ids[0], skip_special_tokens=True))
+        outputs[name] = summaries
+        report["backends"][name] = {"seconds": round(elapsed, 3), "summaries": summaries}
+        del backend
+
+    for name in backend_names:
+        similarities = [
+            SequenceMatcher(None, reference.split(), candidate.split()).ratio()
+            for reference, candidate in zip(outputs[reference_name], outputs[name])
+        ]
+        report["backends"][name]["similarity"] = [round(value, 4) for value in similarities]
+        report["backends"][name]["mean_similarity"] = round(sum(similarities) / len(similarities), 4) if similarities else 0.0
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare summarization backends on the same inputs")
+    parser.add_argument("text_files", nargs="+", help="UTF-8 text files to summarize")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), help="Backends to compare, the first is the reference")
+    parser.add_argument("--model-name", default="plguillou/t5-base-fr-sum-cnndm")
+    parser.add_argument("--num-beams", type=int, default=6)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    texts = []
+    for path in args.text_files:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+
+    default_cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "model_cache")
+    print(json.dumps(
+        check_backend_parity(texts, args.backends, args.model_name, default_cache_dir, num_beams=args.num_beams),
+        ensure_ascii=False,
+        indent=2
+    ))
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+class JsonDiskCache:
+    """
+    Persistent cache of JSON values, bounded by total size on disk.
+
+    Entries are addressed by a SHA-256 key (see `hash_payload`) and stored as
+    one JSON file each, under a two-character prefix directory. Writes go to
+    a temporary file renamed into place, so a concurrent reader never sees a
+    partial entry. File modification times double as the last use, so the
+    least recently used entries are evicted first once the directory grows
+    beyond `max_bytes`, and that order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, enabled: bool = True, label: str = "cache"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, max_bytes)
+        self.enabled = enabled
+        self.label = label
+        self._lock = threading.Lock()
+        # key -> (size in bytes, last use); rebuilt from the directory at startup
+        self._index = {}
+        self._total_bytes = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+            with self._lock:
+                evicted = self._evict()
+            self._remove(evicted)
+
+    def _load_index(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                if not name.endswith(".json"):
+                    continue
+                stat = os.stat(path)
+                self._index[name[:-len(".json")]] = (stat.st_size, stat.st_mtime)
+                self._total_bytes += stat.st_size
+
+    @staticmethod
+    def hash_payload(payload: dict) -> str:
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+        except Exception as e:
+            logging.error(f"Error reading {self.label} cache entry {key}: {str(e)}")
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self._counters["hits"] += 1
+            if key in self._index:
+                self._index[key] = (self._index[key][0], now)
+        return value
+
+    def put(self, key: str, value):
+        if not self.enabled:
+            return
+
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial file
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Error writing {self.label} cache entry {key}: {str(e)}")
+            return
+
+        with self._lock:
+            previous = self._index.get(key)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._index[key] = (size, time.time())
+            self._total_bytes += size
+            self._counters["writes"] += 1
+            evicted = self._evict()
+        self._remove(evicted)
+
+    def _evict(self) -> list:
+        """Drop least recently used entries from the index until under max_bytes; returns their keys"""
+        if self._total_bytes <= self.max_bytes:
+            return []
+        evicted = []
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            del self._index[key]
+            self._total_bytes -= size
+            self._counters["evictions"] += 1
+            evicted.append(key)
+        return evicted
+
+    def _remove(self, keys: list):
+        for key in keys:
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._index)
+            stats["bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_bytes"] = self.max_bytes
+        stats["enabled"] = self.enabled
+        return stats
@@ -0,0 +1,144 @@
+import logging
+import os
+import threading
+import numpy as np
+from app.services.professeur.capture_format import PcmStreamConverter
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SAMPLE_RATE = 16000
+
+# Audio kept in the decoding window, and how much new audio triggers a new pass
+STT_LIVE_WINDOW_SECONDS = float(os.getenv("STT_LIVE_WINDOW_SECONDS", "20"))
+STT_LIVE_STEP_SECONDS = float(os.getenv("STT_LIVE_STEP_SECONDS", "3"))
+# Segments ending this close to the live edge stay partial: the next pass may still change them
+STT_LIVE_HOLD_SECONDS = float(os.getenv("STT_LIVE_HOLD_SECONDS", "4"))
+
+class LiveTranscriber:
+    """
+    Incremental Whisper transcription of an audio stream over a sliding window.
+
+    Audio is fed as 16 kHz mono float32 (`feed`), or as 16-bit PCM blocks in
+    any format (`feed_pcm`), converted by a PcmStreamConverter whose filter
+    state carries across blocks. Each `process` pass decodes the
+    window of audio that is not final yet. Segments that end at least
+    STT_LIVE_HOLD_SECONDS before the live edge (or all but the last one once
+    the window is full) become final and their audio leaves the window; the
+    rest is reported as a partial transcript that later passes may revise.
+    Events are dicts with "type" ("partial" or "final"), "text", "start"
+    and "end", timestamps in seconds from the start of the stream.
+    """
+
+    def __init__(
+        self,
+        model,
+        language: str = None,
+        window_seconds: float = None,
+        step_seconds: float = None,
+        model_lock: threading.Lock = None
+    ):
+        self.model = model
+        # Held around every decoding pass when the model is shared with other sessions
+        self.model_lock = model_lock or threading.Lock()
+        self.language = language
+        self.window = int((window_seconds or STT_LIVE_WINDOW_SECONDS) * WHISPER_SAMPLE_RATE)
+        self.step = int((step_seconds or STT_LIVE_STEP_SECONDS) * WHISPER_SAMPLE_RATE)
+        self.hold = STT_LIVE_HOLD_SECONDS
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # Stream position of the first buffered sample
+        self._unprocessed = 0
+        self._lock = threading.Lock()
+        self._converter = None
+        self.final_segments = []
+
+    def feed(self, samples: np.ndarray):
+        with self._lock:
+            self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False)])
+            self._unprocessed += len(samples)
+
+    def feed_pcm(self, data: bytes, channels: int, rate: int):
+        """Feed a block of interleaved 16-bit PCM; blocks must come from one stream, in order"""
+        converter = self._converter
+        if converter is None or (converter.in_rate, converter.in_channels) != (rate, channels):
+            converter = self._converter = PcmStreamConverter(rate, channels, WHISPER_SAMPLE_RATE)
+        self.feed(converter.convert_float(data))
+
+    def ready(self) -> bool:
+        return self._unprocessed >= self.step
+
+    @property
+    def text(self) -> str:
+        return " ".join(segment["text"] for segment in self.final_segments if segment["text"])
+
+    def _decode(self, audio: np.ndarray) -> list:
+        prompt = self.text[-200:] or None
+        with self.model_lock:
+            result = self.model.transcribe(
+                audio,
+                language=self.language,
+                initial_prompt=prompt,
+                condition_on_previous_text=False,
+                fp16=False
+            )
+        return [
+            {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+            for segment in result["segments"]
+        ]
+
+    def process(self, finish: bool = False) -> list:
+        """Decode the current window and return the new final segments and the partial transcript"""
+        with self._lock:
+            audio = self._buffer
+            buffer_start = self._buffer_start
+            self._unprocessed = 0
+        if len(audio) == 0:
+            return []
+
+        segments = self._decode(audio)
+        duration = len(audio) / WHISPER_SAMPLE_RATE
+        offset = buffer_start / WHISPER_SAMPLE_RATE
+
+        if finish:
+            final_count = len(segments)
+        else:
+            final_count = sum(1 for segment in segments if segment["end"] <= duration - self.hold)
+            if len(audio) >= self.window and segments:
+                # A full window must move forward even while the speaker never pauses
+                final_count = max(final_count, len(segments) - 1, 1)
+
+        events = []
+        for segment in segments[:final_count]:
+            event = {
+                "type": "final",
+                "text": segment["text"],
+                "start": round(offset + segment["start"], 2),
+                "end": round(offset + segment["end"], 2)
+            }
+            self.final_segments.append(event)
+            events.append(event)
+
+        if final_count:
+            consumed = min(len(audio), int(segments[final_count - 1]["end"] * WHISPER_SAMPLE_RATE))
+        elif not segments and len(audio) >= self.window:
+            # Nothing but silence in a full window: keep only the tail
+            consumed = len(audio) - self.step
+        else:
+            consumed = 0
+
+        with self._lock:
+            self._buffer = self._buffer[consumed:]
+            self._buffer_start += consumed
+
+        partial = segments[final_count:]
+        if partial and not finish:
+            events.append({
+                "type": "partial",
+                "text": " ".join(segment["text"] for segment in partial),
+                "start": round(offset + partial[0]["start"], 2),
+                "end": round(offset + partial[-1]["end"], 2)
+            })
+        return events
+
+    def finish(self) -> list:
+        """Finalize everything still in the window"""
+        return self.process(finish=True)
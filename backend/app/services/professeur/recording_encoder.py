@@ -0,0 +1,149 @@
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Codec recordings are compressed to once captured: "wav" keeps the raw file only
+RECORDING_CODEC = os.getenv("RECORDING_CODEC", "flac").lower()
+# Opus bitrate; speech stays intelligible well below this
+RECORDING_OPUS_BITRATE = os.getenv("RECORDING_OPUS_BITRATE", "32k")
+# Keep the WAV file once the compressed file is written
+RECORDING_KEEP_WAV = os.getenv("RECORDING_KEEP_WAV", "false").lower() == "true"
+# Recordings encoded at once; each ffmpeg process already uses several cores
+RECORDING_ENCODER_WORKERS = int(os.getenv("RECORDING_ENCODER_WORKERS", "1"))
+
+RECORDING_CODECS = {
+    "wav": {
+        "extension": ".wav",
+        "media_type": "audio/wav",
+        "arguments": None
+    },
+    "flac": {
+        "extension": ".flac",
+        "media_type": "audio/flac",
+        "arguments": ["-c:a", "flac", "-compression_level", "8"]
+    },
+    "opus": {
+        "extension": ".opus",
+        "media_type": "audio/ogg",
+        # Lecture audio is speech: mono, tuned for voice
+        "arguments": ["-c:a", "libopus", "-b:a", RECORDING_OPUS_BITRATE, "-application", "voip", "-ac", "1"]
+    }
+}
+
+def media_type(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    for codec in RECORDING_CODECS.values():
+        if codec["extension"] == extension:
+            return codec["media_type"]
+    return "application/octet-stream"
+
+class RecordingEncoder:
+    """
+    Compress finished WAV recordings with ffmpeg, off the request path.
+
+    `submit` returns immediately; the encoding runs in an ffmpeg process
+    driven from a small thread pool. The compressed file is written under a
+    temporary name and renamed once complete, then the WAV file is removed
+    unless RECORDING_KEEP_WAV is set or `submit` is asked to keep it. If
+    ffmpeg is missing or fails, the WAV file stays the recording.
+    """
+
+    def __init__(self, workers: int = 1, keep_wav: bool = False):
+        self.keep_wav = keep_wav
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="recording-encoder")
+        self._lock = threading.Lock()
+        # Held while a WAV file is removed, and by readers between choosing a file and opening it
+        self.files_lock = threading.Lock()
+        # WAV path -> {"codec", "status", "output", "future"}
+        self._jobs = {}
+
+    @staticmethod
+    def output_path(wav_path: str, codec: str) -> str:
+        return os.path.splitext(wav_path)[0] + RECORDING_CODECS[codec]["extension"]
+
+    def submit(self, wav_path: str, codec: str, keep_wav: bool = False) -> dict:
+        if codec not in RECORDING_CODECS:
+            raise ValueError(f"Unknown recording codec: {codec}")
+        if codec == "wav":
+            return {"codec": codec, "status": "done", "output": wav_path}
+
+        with self._lock:
+            job = self._jobs.get(wav_path)
+            if job and job["status"] == "encoding":
+                return self._public(job)
+            job = {
+                "codec": codec,
+                "status": "encoding",
+                "output": self.output_path(wav_path, codec),
+                "keep_wav": keep_wav or self.keep_wav,
+                "future": None
+            }
+            self._jobs[wav_path] = job
+            job["future"] = self._executor.submit(self._encode, wav_path, job)
+        return self._public(job)
+
+    def _encode(self, wav_path: str, job: dict):
+        output = job["output"]
+        tmp_output = f"{output}.tmp"
+        try:
+            if not shutil.which("ffmpeg"):
+                raise RuntimeError("FFmpeg is not installed")
+            process = subprocess.run(
+                [
+                    "ffmpeg", "-loglevel", "error", "-y",
+                    "-i", wav_path,
+                    *RECORDING_CODECS[job["codec"]]["arguments"],
+                    "-f", "ogg" if job["codec"] == "opus" else job["codec"],
+                    tmp_output
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            if process.returncode != 0:
+                raise RuntimeError(process.stderr.decode("utf-8", errors="replace").strip() or f"ffmpeg exited with {process.returncode}")
+            os.replace(tmp_output, output)
+        except Exception as e:
+            logger.error(f"Error encoding {wav_path} to {job['codec']}: {str(e)}")
+            if os.path.exists(tmp_output):
+                os.remove(tmp_output)
+            with self._lock:
+                job["status"] = "failed"
+                job["output"] = wav_path
+            return
+
+        wav_size, output_size = os.path.getsize(wav_path), os.path.getsize(output)
+        logger.info(f"Encoded {wav_path} to {output}: {wav_size} -> {output_size} bytes ({wav_size / max(1, output_size):.1f}x)")
+        with self._lock:
+            job["status"] = "done"
+        if not job["keep_wav"]:
+            with self.files_lock:
+                os.remove(wav_path)
+
+    @staticmethod
+    def _public(job: dict) -> dict:
+        return {"codec": job["codec"], "status": job["status"], "output": job["output"]}
+
+    def status(self, wav_path: str) -> dict:
+        with self._lock:
+            job = self._jobs.get(wav_path)
+            return self._public(job) if job else None
+
+    def wait(self, wav_path: str, timeout: float = None) -> dict:
+        """Wait up to `timeout` seconds for the encoding of `wav_path`; returns its status"""
+        with self._lock:
+            job = self._jobs.get(wav_path)
+        if job is None:
+            return None
+        try:
+            job["future"].result(timeout=timeout)
+        except FutureTimeoutError:
+            pass
+        return self.status(wav_path)
+
+recording_encoder = RecordingEncoder(RECORDING_ENCODER_WORKERS, RECORDING_KEEP_WAV)
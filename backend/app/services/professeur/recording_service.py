@@ -13,23 +13,70 @@ from fastapi.responses import FileResponse
 import tempfile
 import shutil
 import logging
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from app.services.professeur.wav_writer import SegmentedWavWriter, recover_recordings, is_pcm16_wav, WAV_HEADER_SIZE
+from app.services.professeur.recording_encoder import recording_encoder, RECORDING_CODEC, RECORDING_CODECS
+from app.services.professeur.audio_mixer import AudioMixer
+from app.services.professeur.capture_format import CAPTURE_PROFILES, DEVICE_RATE, DEVICE_CHANNELS, PcmStreamConverter
 
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Captured frames buffered between the recording thread and the file writer (about 12 s at 44.1 kHz)
+WAV_WRITER_QUEUE_FRAMES = int(os.getenv("WAV_WRITER_QUEUE_FRAMES", "512"))
+# Recordings are written as rolling segments, fsync'd every few seconds: the most audio a crash can lose
+WAV_SYNC_SECONDS = float(os.getenv("WAV_SYNC_SECONDS", "2"))
+WAV_SEGMENT_SECONDS = float(os.getenv("WAV_SEGMENT_SECONDS", "60"))
+# Format recordings are saved in: "whisper" (16 kHz mono, transcribed without resampling) or "studio" (44.1 kHz stereo)
+RECORDING_CAPTURE_PROFILE = os.getenv("RECORDING_CAPTURE_PROFILE", "whisper").lower()
+# Gain applied to system audio and to the microphone before mixing
+RECORDING_SYSTEM_GAIN = float(os.getenv("RECORDING_SYSTEM_GAIN", "1.0"))
+RECORDING_MIC_GAIN = float(os.getenv("RECORDING_MIC_GAIN", "1.0"))
+# Fraction of full scale above which the mix is soft-limited instead of clipped
+RECORDING_LIMITER_THRESHOLD = float(os.getenv("RECORDING_LIMITER_THRESHOLD", "0.8"))
+# How long a download waits for the compressed file before serving the WAV file
+RECORDING_DOWNLOAD_WAIT_SECONDS = float(os.getenv("RECORDING_DOWNLOAD_WAIT_SECONDS", "60"))
+# Keep the WAV file of recordings saved in Whisper's format next to the compressed one:
+# transcription reads it without ffmpeg, at the cost of storing the recording twice
+RECORDING_KEEP_STT_WAV = os.getenv("RECORDING_KEEP_STT_WAV", "false").lower() == "true"
+
 class AudioRecorder:
     def __init__(self):
         try:
             logger.info("Initializing AudioRecorder")
             self.chunk = 1024
             self.sample_format = pyaudio.paInt16
-            self.channels = 2
-            self.fs = 44100
-            self.frames = []
+            if RECORDING_CAPTURE_PROFILE not in CAPTURE_PROFILES:
+                logger.warning(f"Unknown RECORDING_CAPTURE_PROFILE {RECORDING_CAPTURE_PROFILE}, using studio")
+            profile = CAPTURE_PROFILES.get(RECORDING_CAPTURE_PROFILE, CAPTURE_PROFILES["studio"])
+            # Format of the saved file; the devices may be opened in another one and converted
+            self.channels = profile["channels"]
+            self.fs = profile["rate"]
+            self.capture_channels = self.channels
+            self.capture_rate = self.fs
+            self.converter = None
+            # One output buffer per frame the writer can hold, plus the one being written and the one being mixed
+            self.mixer = AudioMixer(
+                gains=(RECORDING_SYSTEM_GAIN, RECORDING_MIC_GAIN),
+                limiter_threshold=RECORDING_LIMITER_THRESHOLD,
+                block_samples=self.chunk * DEVICE_CHANNELS,
+                output_buffers=WAV_WRITER_QUEUE_FRAMES + 2
+            )
+            self.writer = None
+            # Stitching a finished recording copies all of it: done here, off the request path
+            self._finalizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recording-finalizer")
+            self._finalizing_lock = threading.Lock()
+            # Output path -> (stitch future, codec it is encoded to afterwards)
+            self._finalizing = {}
+            # Held by recovery, and by start_recording while it creates the journal of a new recording
+            self._recovery_lock = threading.Lock()
             self.recording = False
+            if RECORDING_CODEC not in RECORDING_CODECS:
+                logger.warning(f"Unknown RECORDING_CODEC {RECORDING_CODEC}, recordings are kept as WAV")
+            self.codec = RECORDING_CODEC if RECORDING_CODEC in RECORDING_CODECS else "wav"
+            self.recording_codec = self.codec
             self.audio = pyaudio.PyAudio()
             
             # Initialize recordings directory
@@ -77,6 +124,8 @@ class AudioRecorder:
             self.record_thread = None
             self.output_filename = None
             self.recording_start_time = None
+            self.frame_listeners = []
+            self._listeners_lock = threading.Lock()
             logger.info("AudioRecorder initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing AudioRecorder: {str(e)}")
@@ -107,27 +156,49 @@ class AudioRecorder:
             logger.error(f"Error finding microphone device: {str(e)}")
             return None
         
-    def _mix_audio_data(self, mix_data, mic_data):
-        """Mix two audio streams together"""
+    def _device_supports(self, device, rate, channels):
         try:
-            # Convert bytes to numpy arrays
-            mix_array = np.frombuffer(mix_data, dtype=np.int16)
-            mic_array = np.frombuffer(mic_data, dtype=np.int16)
-            
-            # Ensure both arrays are the same length
-            min_length = min(len(mix_array), len(mic_array))
-            mix_array = mix_array[:min_length]
-            mic_array = mic_array[:min_length]
-            
-            # Mix the audio (simple addition with clipping prevention)
-            mixed = np.clip(mix_array + mic_array, -32768, 32767).astype(np.int16)
-            
-            # Convert back to bytes
-            return mixed.tobytes()
-        except Exception as e:
-            logger.error(f"Error mixing audio: {str(e)}")
-            return mix_data  # Return system audio if mixing fails
-        
+            return self.audio.is_format_supported(
+                rate,
+                input_device=device['index'],
+                input_channels=channels,
+                input_format=self.sample_format
+            )
+        except ValueError:
+            return False
+
+    def _choose_capture_format(self):
+        """Open the devices in the output format when they all support it, otherwise in the usual 44.1 kHz stereo"""
+        devices = [device for device in [self.stereo_mix_device, self.microphone_device] if device]
+        if all(self._device_supports(device, self.fs, self.channels) for device in devices):
+            return self.fs, self.channels
+        return DEVICE_RATE, DEVICE_CHANNELS
+
+    def add_frame_listener(self, listener):
+        """
+        Receive every captured frame while recording.
+
+        `listener(data, channels, rate)` is called from the recording thread with
+        the mixed 16-bit PCM bytes; it must return quickly. `data` may be a
+        view of a buffer the mixer reuses: copy it to keep it after the call.
+        """
+        with self._listeners_lock:
+            self.frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener):
+        with self._listeners_lock:
+            if listener in self.frame_listeners:
+                self.frame_listeners.remove(listener)
+
+    def _notify_frame_listeners(self, data):
+        with self._listeners_lock:
+            listeners = list(self.frame_listeners)
+        for listener in listeners:
+            try:
+                listener(data, self.channels, self.fs)
+            except Exception as e:
+                logger.error(f"Error in frame listener: {str(e)}")
+
     def _load_course_counter(self):
         """Load or initialize the course counter"""
         try:
@@ -184,8 +255,10 @@ class AudioRecorder:
                     except Exception as e:
                         logger.error(f"Error closing stream during force reset: {str(e)}")
             
+            # Finalize the file of an interrupted recording
+            self._close_writer()
+
             # Reset all state variables
-            self.frames = []
             self.stream_mix = None
             self.stream_mic = None
             self.record_thread = None
@@ -212,13 +285,20 @@ class AudioRecorder:
             self.recording = False
             return False
 
-    def start_recording(self):
-        """Start recording audio from microphone"""
+    def start_recording(self, codec: str = None):
+        """Start recording audio from microphone; `codec` is the compressed format saved after stop"""
         try:
             logger.info("Starting recording")
+
+            if codec is not None and codec not in RECORDING_CODECS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown codec '{codec}'. Available codecs: {', '.join(RECORDING_CODECS)}"
+                )
             
             # Force reset before starting new recording
             self.force_reset()
+            self.recording_codec = codec or self.codec
             
             # Check if we have any recording devices available
             if not self.stereo_mix_device and not self.microphone_device:
@@ -238,6 +318,14 @@ class AudioRecorder:
                     detail=error_msg
                 )
             
+            # Convert in the capture thread when the devices cannot deliver the output format
+            self.capture_rate, self.capture_channels = self._choose_capture_format()
+            if (self.capture_rate, self.capture_channels) != (self.fs, self.channels):
+                self.converter = PcmStreamConverter(self.capture_rate, self.capture_channels, self.fs, self.channels)
+                logger.info(f"Capturing at {self.capture_rate} Hz, {self.capture_channels} channels; saving at {self.fs} Hz, {self.channels} channels")
+            else:
+                self.converter = None
+
             # Generate filename first to ensure we have a valid path
             try:
                 self.output_filename = self._generate_filename()
@@ -249,8 +337,27 @@ class AudioRecorder:
                     detail="Failed to initialize recording: Could not create output file"
                 )
             
+            # Frames are written to the output file as they are captured
+            try:
+                # A recovery running now must not take the journal of this recording for a crashed one
+                with self._recovery_lock:
+                    self.writer = SegmentedWavWriter(
+                        self.output_filename,
+                        self.channels,
+                        self.audio.get_sample_size(self.sample_format),
+                        self.fs,
+                        max_queue_frames=WAV_WRITER_QUEUE_FRAMES,
+                        sync_interval=WAV_SYNC_SECONDS,
+                        segment_seconds=WAV_SEGMENT_SECONDS
+                    ).start()
+            except Exception as e:
+                logger.error(f"Error opening output file: {str(e)}")
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to initialize recording: Could not create output file"
+                )
+
             # Initialize recording state
-            self.frames = []
             self.recording = True
             self.recording_start_time = time.time()
             
@@ -308,8 +415,8 @@ class AudioRecorder:
                 try:
                     self.stream_mix = self.audio.open(
                         format=self.sample_format,
-                        channels=self.channels,
-                        rate=self.fs,
+                        channels=self.capture_channels,
+                        rate=self.capture_rate,
                         frames_per_buffer=self.chunk,
                         input=True,
                         input_device_index=self.stereo_mix_device['index']
@@ -325,8 +432,8 @@ class AudioRecorder:
                 try:
                     self.stream_mic = self.audio.open(
                 format=self.sample_format,
-                channels=self.channels,
-                rate=self.fs,
+                channels=self.capture_channels,
+                rate=self.capture_rate,
                 frames_per_buffer=self.chunk,
                         input=True,
                         input_device_index=self.microphone_device['index']
@@ -344,15 +451,25 @@ class AudioRecorder:
                 raise Exception(error_msg)
             
             logger.info("Starting audio capture loop")
+            release = self.mixer.release
             while self.recording:
                 try:
-                    # Read from both streams
-                    mix_data = self.stream_mix.read(self.chunk) if self.stream_mix else b'\x00' * self.chunk * 2
-                    mic_data = self.stream_mic.read(self.chunk) if self.stream_mic else b'\x00' * self.chunk * 2
+                    # Read from both streams; a missing device is skipped by the mixer
+                    mix_data = self.stream_mix.read(self.chunk) if self.stream_mix else None
+                    mic_data = self.stream_mic.read(self.chunk) if self.stream_mic else None
                     
-                    # Mix the audio
-                    mixed_data = self._mix_audio_data(mix_data, mic_data)
-                    self.frames.append(mixed_data)
+                    # Mix the audio into one of the mixer's reusable buffers
+                    mixed = self.mixer.mix(mix_data, mic_data)
+                    if self.converter:
+                        # The converter returns new bytes: the mixer buffer is free again at once
+                        mixed_data = self.converter.convert(mixed)
+                        release(mixed)
+                        self._notify_frame_listeners(mixed_data)
+                        self.writer.write(mixed_data)
+                    else:
+                        # Listeners run first: the writer hands the buffer back to the mixer once it is on disk
+                        self._notify_frame_listeners(mixed)
+                        self.writer.write(mixed, release=release)
                     
                 except Exception as e:
                     logger.error(f"Error reading audio data: {str(e)}")
@@ -411,31 +528,19 @@ class AudioRecorder:
                 logger.info("Waiting for recording thread to finish")
                 self.record_thread.join(timeout=5.0)  # Add timeout to prevent hanging
             
-            # Save the recorded audio if we have frames
-            if not self.frames:
-                logger.warning("No audio frames to save")
-                return {
-                    "message": "Recording stopped but no audio was captured",
-                    "filename": None,
-                    "duration": 0,
-                    "file_size": 0
-                }
-
             try:
-                # Ensure output directory exists
-                os.makedirs(os.path.dirname(self.output_filename), exist_ok=True)
-                
-                # Save the file
-                self._save_audio_file()
-                
-                # Verify the file was created and has content
-                if not os.path.exists(self.output_filename):
-                    raise Exception("File was not created")
-                
-                file_size = os.path.getsize(self.output_filename)
-                if file_size == 0:
-                    raise Exception("File was created but is empty")
+                # Write the frames still queued; the output file is stitched and compressed in the background
+                data_bytes = self._finalize_audio_file()
+                if data_bytes == 0:
+                    logger.warning("No audio frames to save")
+                    return {
+                        "message": "Recording stopped but no audio was captured",
+                        "filename": None,
+                        "duration": 0,
+                        "file_size": 0
+                    }
                 
+                file_size = WAV_HEADER_SIZE + data_bytes
                 duration = time.time() - self.recording_start_time if self.recording_start_time else 0
                 logger.info(f"Recording stopped successfully. Duration: {duration:.2f} seconds, File size: {file_size} bytes")
                 
@@ -443,7 +548,8 @@ class AudioRecorder:
                     "message": "Recording stopped successfully",
                     "filename": self.output_filename,
                     "duration": round(duration, 2),
-                    "file_size": file_size
+                    "file_size": file_size,
+                    "encoding": self._encoding_status(self.output_filename)
                 }
             except Exception as save_error:
                 logger.error(f"Error saving audio file: {str(save_error)}")
@@ -461,7 +567,7 @@ class AudioRecorder:
             logger.error("Detailed error info:", exc_info=True)
             # Reset recording state
             self.recording = False
-            self.frames = []
+            self._close_writer()
             self.output_filename = None
             self.recording_start_time = None
             raise HTTPException(
@@ -486,24 +592,164 @@ class AudioRecorder:
             self.recording = False
             self.record_thread = None
     
-    def _save_audio_file(self):
-        """Save recorded frames to WAV file"""
+    def _finalize_audio_file(self):
+        """Flush the streaming writer and schedule the WAV file build and encoding; returns the audio bytes written"""
         try:
-            logger.info("Saving audio file")
-            if not self.frames:
-                logger.error("No audio data to save")
-                raise Exception("No audio data to save")
-            
-            with wave.open(self.output_filename, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(self.audio.get_sample_size(self.sample_format))
-                wf.setframerate(self.fs)
-                wf.writeframes(b''.join(self.frames))
-                logger.info(f"Audio file saved successfully: {self.output_filename}")
+            logger.info("Finalizing audio file")
+            return self._finish_writer(self.recording_codec)
         except Exception as e:
             logger.error(f"Error saving audio file: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error saving audio file: {str(e)}")
+
+    def _close_writer(self):
+        """Finalize the writer of an aborted recording, if any, without raising"""
+        try:
+            self._finish_writer(None)
+        except Exception as e:
+            logger.error(f"Error closing audio file: {str(e)}")
+
+    def _finish_writer(self, codec: str = None) -> int:
+        """
+        Write the frames still queued and hand the segments to the finalizer thread.
+
+        Only the queued frames are written before returning; the output file
+        is stitched on the finalizer thread, then encoded to `codec` if set.
+        Returns the audio bytes written.
+        """
+        writer = self.writer
+        self.writer = None
+        if writer is None:
+            return 0
+        writer.finish()
+        if writer.dropped_frames:
+            logger.warning(f"{writer.dropped_frames} frames were dropped while writing {writer.path}")
+        if writer.data_bytes == 0:
+            writer.discard()
+            return 0
+        with self._finalizing_lock:
+            self._finalizing[writer.path] = (self._finalizer.submit(self._stitch, writer, codec), codec)
+        return writer.data_bytes
+
+    def _stitch(self, writer: SegmentedWavWriter, codec: str = None):
+        try:
+            writer.stitch()
+            logger.info(f"Audio file saved successfully: {writer.path}")
+            if codec:
+                # Downloads pick up the compressed file once it is ready
+                recording_encoder.submit(writer.path, codec, keep_wav=self._keeps_stt_wav(writer.path))
+        except Exception as e:
+            # The segments and the journal stay on disk: recover_interrupted_recordings rebuilds the file
+            logger.error(f"Error saving audio file {writer.path}: {str(e)}")
+            raise
+        finally:
+            with self._finalizing_lock:
+                self._finalizing.pop(writer.path, None)
+
+    def _encoding_status(self, path: str) -> dict:
+        """Encoder status of a recording, or "finalizing" while its WAV file is being built"""
+        with self._finalizing_lock:
+            finalizing = self._finalizing.get(path)
+        if finalizing:
+            return {"codec": finalizing[1] or "wav", "status": "finalizing", "output": path}
+        return recording_encoder.status(path)
     
+    def recover_interrupted_recordings(self):
+        """Stitch back the recordings a crash left as segments, except the one in progress"""
+        try:
+            with self._recovery_lock:
+                active = self.output_filename if self.writer is not None else None
+                with self._finalizing_lock:
+                    finalizing = list(self._finalizing)
+                recovered = recover_recordings(self.recordings_dir, exclude=[active, *finalizing])
+            for recording in recovered:
+                recording["encoding"] = recording_encoder.submit(
+                    recording["filename"], self.codec, keep_wav=self._keeps_stt_wav(recording["filename"])
+                )
+            if recovered:
+                logger.info(f"Recovered {len(recovered)} interrupted recordings")
+            return recovered
+        except Exception as e:
+            logger.error(f"Error recovering recordings: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error recovering recordings: {str(e)}")
+
+    def recover_in_background(self):
+        """Run recover_interrupted_recordings in a background thread"""
+        def recover():
+            try:
+                self.recover_interrupted_recordings()
+            except HTTPException:
+                # Already logged; POST /microphone/recover-recordings retries
+                pass
+
+        thread = threading.Thread(target=recover, name="recording-recovery", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _keeps_stt_wav(path: str) -> bool:
+        """Whether the WAV file at `path` is kept once compressed: it is in Whisper's format"""
+        if not RECORDING_KEEP_STT_WAV:
+            return False
+        whisper_format = CAPTURE_PROFILES["whisper"]
+        try:
+            with open(path, "rb") as f:
+                return is_pcm16_wav(f.read(WAV_HEADER_SIZE), whisper_format["channels"], whisper_format["rate"])
+        except OSError:
+            return False
+
+    def get_recording_file(self, wait_seconds: float = RECORDING_DOWNLOAD_WAIT_SECONDS, prefer_wav: bool = False):
+        """
+        Path of the latest recording in its best available form.
+
+        While the WAV file is being built or the compressed file encoded,
+        waits up to `wait_seconds` for it, then falls back to the WAV file.
+        With `prefer_wav`, the WAV file is returned whenever it was kept.
+        """
+        if not self.output_filename:
+            return None
+        deadline = time.monotonic() + wait_seconds
+        with self._finalizing_lock:
+            finalizing = self._finalizing.get(self.output_filename)
+        if finalizing:
+            try:
+                finalizing[0].result(timeout=wait_seconds)
+            except FutureTimeoutError:
+                return None
+            except Exception:
+                # Already logged by _stitch
+                return None
+        if not (prefer_wav and os.path.exists(self.output_filename)):
+            encoding = recording_encoder.status(self.output_filename)
+            if encoding and encoding["status"] == "encoding":
+                recording_encoder.wait(self.output_filename, timeout=max(0.0, deadline - time.monotonic()))
+        return self._resolve_recording_file(prefer_wav)
+
+    def _resolve_recording_file(self, prefer_wav: bool = False):
+        if prefer_wav and os.path.exists(self.output_filename):
+            return self.output_filename
+        encoding = recording_encoder.status(self.output_filename)
+        if encoding and encoding["status"] == "done" and os.path.exists(encoding["output"]):
+            return encoding["output"]
+        return self.output_filename if os.path.exists(self.output_filename) else None
+
+    def copy_recording_file(self, destination_dir: str, prefer_wav: bool = False):
+        """
+        Copy the latest recording (see get_recording_file) into `destination_dir`.
+
+        The file is chosen again and copied under the encoder's file lock, so
+        an encoding that finishes meanwhile cannot remove the WAV file between
+        the choice and the copy. Returns (source path, copy path), or None.
+        """
+        if self.get_recording_file(prefer_wav=prefer_wav) is None:
+            return None
+        with recording_encoder.files_lock:
+            source = self._resolve_recording_file(prefer_wav)
+            if source is None:
+                return None
+            copy = os.path.join(destination_dir, os.path.basename(source))
+            shutil.copy2(source, copy)
+        return source, copy
+
     def get_recording_status(self):
         """Get current recording status"""
         try:
@@ -513,7 +759,9 @@ class AudioRecorder:
                 "duration": round(duration, 2),
                     "filename": self.output_filename,
                     "course_number": self.course_counter if self.recording else None,
-                    "recordings_dir": self.recordings_dir
+                    "recordings_dir": self.recordings_dir,
+                    "encoding": self._encoding_status(self.output_filename) if self.output_filename else None,
+                    "dropped_frames": self.writer.dropped_frames if self.writer else 0
             }
             logger.debug(f"Recording status: {status}")
             return status
@@ -0,0 +1,286 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.core.database import SessionLocal
+from app.db.models.summarization_job import SummarizationJob
+from app.db.models.cours import Cours
+from app.db.models.cours_chunk import CoursChunk
+from app.core.model_registry import model_registry
+from app.services.professeur.summarization_service import get_summarization_service, SummarizationCancelled
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from typing import Optional
+import threading
+import logging
+import os
+import socket
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Summaries are CPU bound: keep the pool small and bound the number of queued jobs
+SUMMARIZATION_WORKERS = int(os.getenv("SUMMARIZATION_WORKERS", "1"))
+SUMMARIZATION_MAX_PENDING_JOBS = int(os.getenv("SUMMARIZATION_MAX_PENDING_JOBS", "20"))
+
+ACTIVE_STATUSES = ("pending", "running")
+
+def instance_id() -> str:
+    """Identifies this process among the servers sharing the database; computed per call, so forked workers differ"""
+    return f"{socket.gethostname()}:{os.getpid()}:{int(psutil.Process().create_time())}"
+
+def owner_alive(owner: Optional[str]) -> bool:
+    """
+    Whether the process recorded as a job owner is still running.
+
+    Processes on this host are checked by pid and start time, so a reused pid
+    does not count. Owners on other hosts cannot be checked and are assumed
+    alive; jobs without an owner predate the column and are assumed dead.
+    """
+    try:
+        host, pid, started = owner.rsplit(":", 2)
+        pid, started = int(pid), int(started)
+    except (AttributeError, ValueError):
+        return False
+    if host != socket.gethostname():
+        return True
+    try:
+        return int(psutil.Process(pid).create_time()) == started
+    except psutil.Error:
+        return False
+
+def store_chunk_state(cours: Cours) -> None:
+    """
+    Record the chunk state of a freshly summarized course, for incremental re-summarization.
+
+    Chunk summaries are read from the summary cache, where producing the
+    summary left them; nothing is generated. Does nothing while the
+    summarization model is not loaded (no summary was produced in this process).
+    """
+    service = model_registry.get_if_loaded("summarization")
+    if service is None or not cours.transcription:
+        return
+    try:
+        states = service.cached_chunk_states(cours.transcription)
+    except Exception as e:
+        logger.error(f"Error computing the chunk state of course {cours.id}: {str(e)}")
+        return
+    cours.chunks = [
+        CoursChunk(
+            position=position,
+            start_char=state["start"],
+            end_char=state["end"],
+            chunk_hash=state["chunk_hash"],
+            summary=state["summary"]
+        )
+        for position, state in enumerate(states)
+    ]
+
+class SummarizationJobService:
+    _executor = ThreadPoolExecutor(max_workers=SUMMARIZATION_WORKERS, thread_name_prefix="summarization")
+    _cancel_events = {}
+    _lock = threading.Lock()
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def submit_job(
+        self,
+        text: str,
+        professeur_id: int,
+        extractive_budget: Optional[int] = None,
+        profile: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ) -> SummarizationJob:
+        if not text or not text.strip():
+            raise HTTPException(status_code=400, detail="Text to summarize is empty")
+
+        active_jobs = self.db.query(SummarizationJob).filter(
+            SummarizationJob.status.in_(ACTIVE_STATUSES)
+        ).count()
+        if active_jobs >= SUMMARIZATION_MAX_PENDING_JOBS:
+            raise HTTPException(status_code=503, detail="Too many summarization jobs in progress, please retry later")
+
+        job = SummarizationJob(
+            professeur_id=professeur_id,
+            status="pending",
+            owner=instance_id(),
+            text=text,
+            progress_current=0,
+            progress_total=0
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+
+        with self._lock:
+            self._cancel_events[job.id] = threading.Event()
+        self._executor.submit(self._run_job, job.id, extractive_budget, profile, latency_budget)
+        logger.info(f"Submitted summarization job {job.id} for professor {professeur_id}")
+        return job
+
+    def get_job(self, job_id: int, professeur_id: int) -> SummarizationJob:
+        job = self.db.query(SummarizationJob).filter(
+            SummarizationJob.id == job_id,
+            SummarizationJob.professeur_id == professeur_id
+        ).first()
+
+        if not job:
+            raise HTTPException(status_code=404, detail="Summarization job not found")
+        return job
+
+    def cancel_job(self, job_id: int, professeur_id: int) -> SummarizationJob:
+        job = self.get_job(job_id, professeur_id)
+        if job.status not in ACTIVE_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+
+        with self._lock:
+            event = self._cancel_events.get(job.id)
+        if event:
+            event.set()
+
+        # A pending job never reaches the model; a running one stops at its next progress step
+        if job.status == "pending" or event is None:
+            job.status = "cancelled"
+            job.time_finished = func.now()
+        self.db.commit()
+        self.db.refresh(job)
+        logger.info(f"Cancellation requested for summarization job {job.id}")
+        return job
+
+    @classmethod
+    def _run_job(
+        cls,
+        job_id: int,
+        extractive_budget: Optional[int] = None,
+        profile: Optional[str] = None,
+        latency_budget: Optional[float] = None
+    ):
+        db = SessionLocal()
+        with cls._lock:
+            cancel_event = cls._cancel_events.get(job_id)
+        try:
+            job = db.query(SummarizationJob).filter(SummarizationJob.id == job_id).first()
+            if not job or job.status != "pending" or (cancel_event and cancel_event.is_set()):
+                return
+
+            job.status = "running"
+            job.time_started = func.now()
+            db.commit()
+
+            def on_progress(current: int, total: int):
+                if cancel_event and cancel_event.is_set():
+                    raise SummarizationCancelled()
+                job.progress_current = current
+                job.progress_total = total
+                db.commit()
+
+            summary = get_summarization_service().summarize_text(
+                job.text,
+                progress_callback=on_progress,
+                extractive_budget=extractive_budget,
+                profile=profile,
+                latency_budget=latency_budget
+            )
+
+            job.status = "completed"
+            job.summary = summary
+            job.time_finished = func.now()
+            db.commit()
+            logger.info(f"Summarization job {job_id} completed")
+
+            # The job may have been attached to a course while it was running
+            db.refresh(job)
+            cls.apply_to_cours(db, job)
+        except SummarizationCancelled:
+            db.rollback()
+            cls._finish_with_status(db, job_id, "cancelled")
+            logger.info(f"Summarization job {job_id} cancelled")
+        except Exception as e:
+            db.rollback()
+            cls._finish_with_status(db, job_id, "failed", error=str(e))
+            logger.error(f"Summarization job {job_id} failed: {str(e)}")
+        finally:
+            with cls._lock:
+                cls._cancel_events.pop(job_id, None)
+            db.close()
+
+    @classmethod
+    def _finish_with_status(cls, db: Session, job_id: int, status: str, error: Optional[str] = None):
+        job = db.query(SummarizationJob).filter(SummarizationJob.id == job_id).first()
+        if job:
+            job.status = status
+            job.error = error
+            job.time_finished = func.now()
+            db.commit()
+            cls.apply_to_cours(db, job)
+
+    def get_refinement_job(self, job_id: int, professeur_id: int) -> SummarizationJob:
+        """A job that can still refine a course summary: 404 if unknown, 409 if cancelled"""
+        job = self.get_job(job_id, professeur_id)
+        if job.status == "cancelled":
+            raise HTTPException(status_code=409, detail="Refinement job was cancelled")
+        return job
+
+    def attach_to_cours(self, job: SummarizationJob, cours: Cours) -> None:
+        """
+        Make a refinement job write its summary into `cours` once it completes.
+
+        The course keeps its draft summary with status "draft" until then. A job
+        that already finished is applied right away. Commits the session, so a
+        course added but not yet committed is created together with the link.
+        """
+        job.cours_id = cours.id
+        cours.summary_status = "draft"
+        self.db.commit()
+
+        # Re-read the status after linking: a job finishing concurrently applies itself otherwise
+        self.db.refresh(job)
+        self.apply_to_cours(self.db, job)
+
+    @staticmethod
+    def apply_to_cours(db: Session, job: SummarizationJob) -> None:
+        """Replace the draft summary of the job's course with the job outcome"""
+        if job.cours_id is None or job.status in ACTIVE_STATUSES:
+            return
+
+        cours = db.query(Cours).filter(Cours.id == job.cours_id).first()
+        # A summary edited by the professor in the meantime is never overwritten
+        if not cours or cours.summary_status != "draft":
+            return
+
+        if job.status == "completed":
+            cours.summary = job.summary
+            cours.summary_status = "final"
+            store_chunk_state(cours)
+        else:
+            cours.summary_status = "failed"
+        db.commit()
+        logger.info(f"Course {cours.id} summary is now {cours.summary_status} (job {job.id})")
+
+    @staticmethod
+    def fail_interrupted_jobs():
+        """
+        Mark jobs left pending or running by a dead process as failed.
+
+        Jobs of other live processes (several uvicorn workers, or the old
+        instance during a rolling restart) are left alone: see owner_alive.
+        """
+        db = SessionLocal()
+        try:
+            active = db.query(SummarizationJob.id, SummarizationJob.owner).filter(
+                SummarizationJob.status.in_(ACTIVE_STATUSES)
+            ).all()
+            dead_ids = [job_id for job_id, owner in active if not owner_alive(owner)]
+            interrupted = 0
+            if dead_ids:
+                interrupted = db.query(SummarizationJob).filter(
+                    SummarizationJob.id.in_(dead_ids),
+                    SummarizationJob.status.in_(ACTIVE_STATUSES)
+                ).update(
+                    {"status": "failed", "error": "Interrupted by a server restart", "time_finished": func.now()},
+                    synchronize_session=False
+                )
+            db.commit()
+            if interrupted:
+                logger.info(f"Marked {interrupted} interrupted summarization jobs as failed")
+        finally:
+            db.close()
@@ -1,10 +1,53 @@
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
+from transformers import AutoTokenizer
 import torch
 import logging
 import psutil
 import os
 import time
 import traceback
+from app.services.professeur.summary_cache import SummaryCache
+from app.services.professeur.text_chunker import SentenceChunker, TextChunk
+from app.services.professeur.inference_backends import create_backend
+from app.services.professeur.extractive_summarizer import reduce_to_token_budget
+from app.services.professeur.batching_scheduler import BatchingScheduler
+from app.services.professeur.generation_profiles import GENERATION_PROFILES, ThroughputTracker, get_generation_profile
+from app.core.model_registry import model_registry
+from concurrent.futures import as_completed
+from contextlib import closing
+import hashlib
+import itertools
+import math
+
+# Inference engine: "torch", "torch-int8" or "onnx" (see inference_backends)
+SUMMARIZATION_BACKEND = os.getenv("SUMMARIZATION_BACKEND", "torch")
+
+# Number of chunks sent together through model.generate during the map stage
+SUMMARIZATION_BATCH_SIZE = int(os.getenv("SUMMARIZATION_BATCH_SIZE", "4"))
+
+# Cross-request batching: generate calls from concurrent requests are merged into shared batches
+SUMMARIZATION_SCHEDULER_ENABLED = os.getenv("SUMMARIZATION_SCHEDULER_ENABLED", "true").lower() == "true"
+SUMMARIZATION_SCHEDULER_MAX_BATCH_SIZE = int(os.getenv("SUMMARIZATION_SCHEDULER_MAX_BATCH_SIZE", str(SUMMARIZATION_BATCH_SIZE)))
+SUMMARIZATION_SCHEDULER_MAX_WAIT_MS = float(os.getenv("SUMMARIZATION_SCHEDULER_MAX_WAIT_MS", "20"))
+# Inputs are only batched with inputs of a similar length, in buckets of this many tokens
+SUMMARIZATION_SCHEDULER_LENGTH_BUCKET = 256
+
+# Token budget of the optional extractive stage run on long transcripts before chunking (0 disables it)
+SUMMARIZATION_EXTRACTIVE_BUDGET = int(os.getenv("SUMMARIZATION_EXTRACTIVE_BUDGET", "0"))
+
+# Size of the extractive draft returned while the full summary is generated in the background
+SUMMARIZATION_DRAFT_MAX_TOKENS = int(os.getenv("SUMMARIZATION_DRAFT_MAX_TOKENS", "300"))
+SUMMARIZATION_DRAFT_RATIO = float(os.getenv("SUMMARIZATION_DRAFT_RATIO", "0.2"))
+
+# Tokens of trailing sentences repeated at the start of the next chunk
+SUMMARIZATION_CHUNK_OVERLAP_TOKENS = int(os.getenv("SUMMARIZATION_CHUNK_OVERLAP_TOKENS", "0"))
+
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "512"))
+# Size of the on-disk tier; least recently used summaries are deleted beyond it
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+class SummarizationCancelled(Exception):
+    """Raised from a progress callback to abort a running summarization"""
 
 class SummarizationService:
     _instance = None
@@ -27,6 +70,12 @@ class SummarizationService:
 
             self.model_name = "plguillou/t5-base-fr-sum-cnndm"  # Fine-tuned for summarization in French
             self.cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "model_cache")
+            self.summary_cache = SummaryCache(
+                cache_dir=os.getenv("SUMMARY_CACHE_DIR", os.path.join(os.path.dirname(self.cache_dir), "summary_cache")),
+                max_memory_entries=SUMMARY_CACHE_MAX_ENTRIES,
+                max_disk_bytes=SUMMARY_CACHE_MAX_BYTES,
+                enabled=SUMMARY_CACHE_ENABLED
+            )
 
             process = psutil.Process(os.getpid())
             logging.info(f"Memory usage before loading: {process.memory_info().rss / 1024 / 1024:.2f} MB")
@@ -36,7 +85,8 @@ class SummarizationService:
             logging.info(f"Tokenizer loaded in {time.time() - tokenizer_start:.2f} seconds")
 
             model_start = time.time()
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name, cache_dir=self.cache_dir)
+            self.backend = create_backend(SUMMARIZATION_BACKEND, self.model_name, self.cache_dir)
+            self.model = self.backend.model
             logging.info(f"Model loaded in {time.time() - model_start:.2f} seconds")
 
             if torch.cuda.is_available():
@@ -47,6 +97,19 @@ class SummarizationService:
                 logging.info("Running on CPU")
 
             self.tokenizer.model_max_length = 1024
+            self._batch_ids = itertools.count(1)
+            self.throughput = ThroughputTracker()
+            self.scheduler = BatchingScheduler(
+                self._run_scheduled_batch,
+                max_batch_size=SUMMARIZATION_SCHEDULER_MAX_BATCH_SIZE,
+                max_wait_ms=SUMMARIZATION_SCHEDULER_MAX_WAIT_MS,
+                name="summarization-scheduler"
+            ) if SUMMARIZATION_SCHEDULER_ENABLED else None
+            self.chunker = SentenceChunker(
+                self.tokenizer,
+                max_tokens=self.tokenizer.model_max_length,
+                overlap_tokens=SUMMARIZATION_CHUNK_OVERLAP_TOKENS
+            )
 
             logging.info(f"Memory usage after loading: {process.memory_info().rss / 1024 / 1024:.2f} MB")
             logging.info(f"Total initialization time: {time.time() - start_time:.2f} seconds")
@@ -62,24 +125,14 @@ class SummarizationService:
             raise
 
     def chunk_text_by_tokenization(self, text: str, max_tokens: int = 1024) -> list:
+        """Sentence-aligned chunks of `text`, each carrying its token ids"""
         try:
             if not text or not isinstance(text, str):
                 logging.error(f"Invalid input text: {type(text)}")
                 return []
 
             logging.info(f"Chunking text of length {len(text)} characters")
-            token_ids = self.tokenizer.encode(text, add_special_tokens=False)
-            if len(token_ids) <= max_tokens:
-                return [text]
-
-            chunks = []
-            for start in range(0, len(token_ids), max_tokens):
-                chunk_token_ids = token_ids[start: start + max_tokens]
-                chunk = self.tokenizer.decode(chunk_token_ids, skip_special_tokens=True)
-                chunks.append(chunk)
-
-            logging.info(f"Text chunked into {len(chunks)} chunks")
-            return chunks
+            return self.chunker.chunk(text, max_tokens=max_tokens)
         except Exception as e:
             logging.error(f"Error in chunk_text_by_tokenization: {str(e)}")
             logging.error(f"Traceback: {traceback.format_exc()}")
@@ -91,101 +144,531 @@ class SummarizationService:
         sentences = [s.capitalize() for s in sentences]
         return ". ".join(sentences)
 
-    def generate_summary_for_chunk(self, chunk: str, num_beams: int = 6) -> str:
+    def summary_length_range(self, input_tokens: int, profile=None) -> tuple:
+        # quality: at least 100 tokens or 30% of input, at most 1000 tokens or 70% of input
+        return get_generation_profile(profile).length_range(input_tokens)
+
+    def summary_cache_key(self, text: str, profile=None, stage: str = "chunk") -> str:
+        params = {
+            "stage": stage,
+            **get_generation_profile(profile).cache_params(),
+            "max_input_tokens": self.tokenizer.model_max_length,
+            "backend": self.backend.name
+        }
+        return self.summary_cache.make_key(text, self.model_name, params)
+
+    def estimate_seconds(self, text: str, profile=None, extractive_budget: int = 0) -> float:
+        """
+        Expected generation time of `text` with a profile, from the measured tokens/sec.
+
+        Output length is taken as the profile's minimum summary length, which
+        the model has to reach, for every chunk and for the final reduce step.
+        """
+        profile = get_generation_profile(profile)
+        max_input = self.tokenizer.model_max_length
+        input_tokens = len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+        if len(text.split()) < 2000:
+            output_tokens = profile.length_range(min(input_tokens, max_input))[0]
+        else:
+            if extractive_budget:
+                input_tokens = min(input_tokens, extractive_budget)
+            chunks = max(1, math.ceil(input_tokens / max_input))
+            chunk_output = profile.length_range(min(input_tokens, max_input))[0]
+            reduce_output = profile.length_range(min(chunks * chunk_output, max_input))[0]
+            output_tokens = chunks * chunk_output + reduce_output
+
+        return output_tokens / self.throughput.tokens_per_second(profile)
+
+    def choose_profile(self, text: str, latency_budget: float, extractive_budget: int = 0) -> str:
+        """The most thorough profile expected to finish within `latency_budget` seconds"""
+        for profile in reversed(list(GENERATION_PROFILES.values())):
+            estimate = self.estimate_seconds(text, profile, extractive_budget)
+            if estimate <= latency_budget:
+                logging.info(f"Profile '{profile.name}' fits the {latency_budget:.1f}s budget (estimated {estimate:.1f}s)")
+                return profile.name
+        fastest = next(iter(GENERATION_PROFILES))
+        logging.info(f"No profile fits the {latency_budget:.1f}s budget, using '{fastest}'")
+        return fastest
+
+    def encode_for_generation(self, chunk) -> list:
+        """
+        Token ids to feed the model for a chunk, without truncation.
+
+        Chunks produced by the chunker already carry their ids, so they are
+        never tokenized again; plain strings are encoded exactly once.
+        """
+        if isinstance(chunk, TextChunk):
+            if chunk.token_ids:
+                return chunk.token_ids
+            chunk = chunk.text
+        return self.tokenizer(chunk)["input_ids"]
+
+    def _truncate_for_model(self, token_ids: list) -> list:
+        max_length = self.tokenizer.model_max_length
+        if len(token_ids) <= max_length:
+            return token_ids
+        return token_ids[:max_length - 1] + [self.tokenizer.eos_token_id]
+
+    def _generate_from_token_ids(self, token_id_lists: list, profile, min_length: int, max_length: int) -> list:
+        """Run one padded generate call on the inference backend and return the cleaned summaries"""
+        profile = get_generation_profile(profile)
+        inputs = self.tokenizer.pad(
+            {"input_ids": [self._truncate_for_model(ids) for ids in token_id_lists]},
+            padding=True,
+            return_tensors="pt"
+        )
+        inputs = {k: v.to(self.backend.device) for k, v in inputs.items()}
+
+        start_time = time.time()
+        summary_ids = self.backend.generate(
+            inputs["input_ids"],
+            inputs["attention_mask"],
+            num_beams=profile.num_beams,
+            no_repeat_ngram_size=profile.no_repeat_ngram_size,
+            early_stopping=profile.num_beams > 1,
+            pad_token_id=self.tokenizer.pad_token_id,
+            length_penalty=profile.length_penalty,
+            min_length=min_length,
+            max_length=max_length,
+            do_sample=False
+        )
+        # Decoding steps of the call: the length of the longest generated sequence
+        self.throughput.record(profile, summary_ids.shape[-1], time.time() - start_time)
+
+        decoded = self.tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+        return [self.clean_summary(summary) for summary in decoded]
+
+    def _scheduler_key(self, profile, token_ids: list) -> tuple:
+        return (get_generation_profile(profile).name, min(len(token_ids), self.tokenizer.model_max_length) // SUMMARIZATION_SCHEDULER_LENGTH_BUCKET)
+
+    def _run_scheduled_batch(self, key: tuple, token_id_lists: list) -> list:
+        """Batch runner for the scheduler: returns (summary, batch info) for every input"""
+        profile = key[0]
+        start_time = time.time()
+
+        # Batch items share one length range: keep the smallest floor and the largest ceiling
+        ranges = [self.summary_length_range(len(token_ids), profile) for token_ids in token_id_lists]
+        summaries = self._generate_from_token_ids(
+            token_id_lists,
+            profile,
+            min(r[0] for r in ranges),
+            max(r[1] for r in ranges)
+        )
+
+        info = {
+            "batch": next(self._batch_ids),
+            "chunks": len(token_id_lists),
+            "padded_tokens": min(max(len(token_ids) for token_ids in token_id_lists), self.tokenizer.model_max_length),
+            "seconds": round(time.time() - start_time, 3)
+        }
+        logging.info(
+            f"Scheduled batch {info['batch']}: {info['chunks']} inputs, "
+            f"{info['padded_tokens']} padded tokens, generated in {info['seconds']:.2f} seconds"
+        )
+        return [(summary, info) for summary in summaries]
+
+    def generate_summary_for_chunk(self, chunk, profile: str = None) -> str:
         try:
-            if not chunk or not isinstance(chunk, str):
+            chunk_text = chunk.text if isinstance(chunk, TextChunk) else chunk
+            if not chunk_text or not isinstance(chunk_text, str):
                 logging.error(f"Invalid chunk input: {type(chunk)}")
                 return ""
 
+            cache_key = self.summary_cache_key(chunk_text, profile)
+            cached_summary = self.summary_cache.get(cache_key)
+            if cached_summary is not None:
+                logging.info(f"Summary cache hit for chunk of length {len(chunk_text)} characters")
+                return cached_summary
+
             start_time = time.time()
-            logging.info(f"Generating summary for chunk of length {len(chunk)} characters")
+            logging.info(f"Generating summary for chunk of length {len(chunk_text)} characters")
 
             # Calculate dynamic summary length based on input length
-            input_tokens = len(self.tokenizer.encode(chunk))
-            min_summary_tokens = max(100, int(input_tokens * 0.3))  # At least 200 tokens or 30% of input
-            max_summary_tokens = min(1000, int(input_tokens * 0.7))  # At most 1024 tokens or 70% of input
-            
-            logging.info(f"Input tokens: {input_tokens}, Summary length range: {min_summary_tokens}-{max_summary_tokens} tokens")
-
-            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            self.model.to(device)
+            token_ids = self.encode_for_generation(chunk)
+            input_tokens = len(token_ids)
+            min_summary_tokens, max_summary_tokens = self.summary_length_range(input_tokens, profile)
 
-            inputs = self.tokenizer(
-                chunk,
-                return_tensors="pt",
-                truncation=True,
-                max_length=self.tokenizer.model_max_length,
-                padding=True
-            )
-            inputs = {k: v.to(device) for k, v in inputs.items()}
-
-            summary_ids = self.model.generate(
-                inputs["input_ids"],
-                num_beams=num_beams,
-                no_repeat_ngram_size=3,
-                early_stopping=True,
-                pad_token_id=self.tokenizer.pad_token_id,
-                length_penalty=1.0,
-                min_length=min_summary_tokens,
-                max_length=max_summary_tokens,
-                do_sample=False
-            )
+            logging.info(f"Input tokens: {input_tokens}, Summary length range: {min_summary_tokens}-{max_summary_tokens} tokens")
 
-            summary = self.tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-            summary = self.clean_summary(summary)
+            if self.scheduler:
+                summary = self.scheduler.submit(self._scheduler_key(profile, token_ids), token_ids).result()[0]
+            else:
+                summary = self._generate_from_token_ids([token_ids], profile, min_summary_tokens, max_summary_tokens)[0]
 
             logging.info(f"Summary generated in {time.time() - start_time:.2f} seconds")
             logging.info(f"Summary length: {len(summary)} characters")
+            self.summary_cache.put(cache_key, summary)
             return summary
         except Exception as e:
             logging.error(f"Error in generate_summary_for_chunk: {str(e)}")
             logging.error(f"Traceback: {traceback.format_exc()}")
             raise
 
-    def summarize_text(self, text: str) -> str:
-        try:
-            if not text or not isinstance(text, str):
-                logging.error(f"Invalid input text: {type(text)}")
-                return ""
+    def iter_chunk_summaries(self, chunks: list, profile: str = None, batch_size: int = None, timings: list = None):
+        """
+        Yield (index, summary) pairs as soon as each chunk summary is available.
+
+        Chunks already in the summary cache are yielded first. The rest go
+        through the shared scheduler and may be batched with chunks of
+        concurrent requests. Only when the scheduler is disabled are they
+        grouped by token length into local micro-batches of `batch_size`
+        (SUMMARIZATION_BATCH_SIZE by default). When a `timings` list is given,
+        one entry per batch is appended to it. Closing the generator early
+        cancels the chunks still waiting in the scheduler.
+        """
+        if not chunks:
+            return
 
-            start_time = time.time()
-            logging.info("=" * 50)
-            logging.info("Starting text summarization process")
-            logging.info(f"Input text length: {len(text)} characters")
+        use_scheduler = self.scheduler is not None
+        batch_size = max(1, batch_size or SUMMARIZATION_BATCH_SIZE)
+        chunk_texts = [chunk.text if isinstance(chunk, TextChunk) else chunk for chunk in chunks]
+        cache_keys = [self.summary_cache_key(text, profile) for text in chunk_texts]
+
+        pending = []
+        cached = []
+        for i, key in enumerate(cache_keys):
+            cached_summary = self.summary_cache.get(key)
+            if cached_summary is not None:
+                cached.append((i, cached_summary))
+            else:
+                pending.append(i)
+
+        if cached:
+            logging.info(f"Summary cache hit for {len(cached)}/{len(chunks)} chunks")
+            yield from cached
+
+        token_ids = {i: self.encode_for_generation(chunks[i]) for i in pending}
+
+        if use_scheduler:
+            futures = {
+                self.scheduler.submit(self._scheduler_key(profile, token_ids[i]), token_ids[i]): i
+                for i in pending
+            }
+            seen_batches = set()
+            try:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    summary, info = future.result()
+                    self.summary_cache.put(cache_keys[i], summary)
+                    if timings is not None and info["batch"] not in seen_batches:
+                        seen_batches.add(info["batch"])
+                        timings.append(info)
+                    yield i, summary
+            finally:
+                # Cancelled, failed or abandoned by the consumer: do not generate what nobody will read
+                for future in futures:
+                    future.cancel()
+            return
 
-            if len(text.split()) < 2000:
-                logging.info("Text is short enough to summarize directly")
-                return self.generate_summary_for_chunk(text, num_beams=6)
+        order = sorted(pending, key=lambda i: len(token_ids[i]))
 
-            chunks = self.chunk_text_by_tokenization(text, max_tokens=1024)
-            if not chunks:
-                logging.error("No valid chunks generated from input text")
-                return ""
+        for batch_number, start in enumerate(range(0, len(order), batch_size), 1):
+            batch_indices = order[start: start + batch_size]
+            batch_start = time.time()
 
-            chunk_summaries = []
-            for i, chunk in enumerate(chunks, 1):
-                logging.info(f"Processing chunk {i}/{len(chunks)}")
-                summary = self.generate_summary_for_chunk(chunk, num_beams=6)
-                if summary:
-                    chunk_summaries.append(summary)
+            # Batch items share one length range: keep the smallest floor and the largest ceiling
+            ranges = [self.summary_length_range(len(token_ids[i]), profile) for i in batch_indices]
+            min_summary_tokens = min(r[0] for r in ranges)
+            max_summary_tokens = max(r[1] for r in ranges)
 
-            if not chunk_summaries:
-                logging.error("No valid summaries generated from chunks")
-                return ""
+            batch_summaries = self._generate_from_token_ids(
+                [token_ids[i] for i in batch_indices],
+                profile,
+                min_summary_tokens,
+                max_summary_tokens
+            )
+            for i, summary in zip(batch_indices, batch_summaries):
+                self.summary_cache.put(cache_keys[i], summary)
+
+            elapsed = time.time() - batch_start
+            padded_tokens = min(max(len(token_ids[i]) for i in batch_indices), self.tokenizer.model_max_length)
+            logging.info(
+                f"Batch {batch_number}: {len(batch_indices)} chunks, "
+                f"{padded_tokens} padded tokens, generated in {elapsed:.2f} seconds"
+            )
+            if timings is not None:
+                timings.append({
+                    "batch": batch_number,
+                    "chunks": len(batch_indices),
+                    "padded_tokens": padded_tokens,
+                    "seconds": round(elapsed, 3)
+                })
+
+            yield from zip(batch_indices, batch_summaries)
+
+    def generate_summaries_batch(self, chunks: list, profile: str = None, batch_size: int = None, timings: list = None, progress_callback=None) -> list:
+        """
+        Summarize several chunks with padded micro-batches of model.generate.
+
+        Summaries are returned in the same order as the input chunks, and
+        `progress_callback(done, total)` is called as chunks complete.
+        """
+        try:
+            summaries = [""] * len(chunks)
+            done = 0
+            with closing(self.iter_chunk_summaries(chunks, profile=profile, batch_size=batch_size, timings=timings)) as results:
+                for i, summary in results:
+                    summaries[i] = summary
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, len(chunks))
+            return summaries
+        except SummarizationCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"Error in generate_summaries_batch: {str(e)}")
+            logging.error(f"Traceback: {traceback.format_exc()}")
+            raise
 
-            combined_summary_text = " ".join(chunk_summaries)
-            logging.info("Generating final summary from combined chunks")
+    def extractive_reduce(self, text: str, token_budget: int) -> str:
+        """Cut a transcript down to its most central sentences within `token_budget` tokens"""
+        start_time = time.time()
+        count_tokens = lambda sentences: [len(ids) for ids in self.tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+        reduced = reduce_to_token_budget(text, token_budget, count_tokens)
+        logging.info(f"Extractive stage: {len(text)} -> {len(reduced)} characters in {time.time() - start_time:.2f} seconds")
+        return reduced
+
+    def draft_summary(self, text: str) -> str:
+        """
+        Fast extractive draft of a transcript, without running the model.
+
+        The most central sentences are kept, up to SUMMARIZATION_DRAFT_RATIO of
+        the transcript and at most SUMMARIZATION_DRAFT_MAX_TOKENS tokens, so a
+        draft is available in well under a second while the abstractive summary
+        is still being generated.
+        """
+        if not text or not text.strip():
+            return ""
+        input_tokens = len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+        token_budget = min(SUMMARIZATION_DRAFT_MAX_TOKENS, max(60, int(input_tokens * SUMMARIZATION_DRAFT_RATIO)))
+        return self.extractive_reduce(text, token_budget)
+
+    def iter_summary_events(
+        self,
+        text: str,
+        batch_size: int = None,
+        extractive_budget: int = None,
+        profile: str = None,
+        latency_budget: float = None
+    ):
+        """
+        Summarize a transcript and yield events as the work progresses.
+
+        Long transcripts are first cut to `extractive_budget` tokens by the
+        extractive stage when a budget is given (or configured); 0 disables it.
+        Generation uses the named `profile`; without one, a `latency_budget` in
+        seconds picks the most thorough profile expected to fit, otherwise the
+        default profile is used.
+
+        Events are dicts with an "event" key:
+            - "start": number of chunks and whether a final reduce step follows
+            - "chunk": one chunk summary, as soon as its batch is generated
+            - "final": the reduced summary of the whole transcript
+        """
+        start_time = time.time()
+        logging.info("=" * 50)
+        logging.info("Starting text summarization process")
+        logging.info(f"Input text length: {len(text)} characters")
+
+        if extractive_budget is None:
+            extractive_budget = SUMMARIZATION_EXTRACTIVE_BUDGET
+        if profile is None and latency_budget is not None:
+            profile = self.choose_profile(text, latency_budget, extractive_budget)
+        profile = get_generation_profile(profile).name
+
+        document_stage = f"document:extractive-{extractive_budget}" if extractive_budget else "document"
+        document_cache_key = self.summary_cache_key(text, profile, stage=document_stage)
+        cached_summary = self.summary_cache.get(document_cache_key)
+        if cached_summary is not None:
+            logging.info("Summary cache hit for the whole document")
+            yield {"event": "start", "chunks": 0, "reduce": False, "profile": profile, "cached": True}
+            yield {"event": "final", "summary": cached_summary, "cached": True}
+            return
 
-            final_summary = self.generate_summary_for_chunk(combined_summary_text, num_beams=6)
+        if len(text.split()) < 2000:
+            logging.info("Text is short enough to summarize directly")
+            yield {"event": "start", "chunks": 1, "reduce": False, "profile": profile}
+            summary = self.generate_summary_for_chunk(text, profile)
+            yield {"event": "final", "summary": summary}
+            return
 
-            logging.info(f"Summarization completed in {time.time() - start_time:.2f} seconds")
-            logging.info(f"Final summary length: {len(final_summary)} characters")
-            logging.info("=" * 50)
+        if extractive_budget:
+            text = self.extractive_reduce(text, extractive_budget)
+
+        chunks = self.chunk_text_by_tokenization(text, max_tokens=1024)
+        if not chunks:
+            logging.error("No valid chunks generated from input text")
+            yield {"event": "final", "summary": ""}
+            return
+
+        if self.scheduler is not None:
+            logging.info(f"Processing {len(chunks)} chunks through the batching scheduler")
+        else:
+            logging.info(f"Processing {len(chunks)} chunks in batches of {batch_size or SUMMARIZATION_BATCH_SIZE}")
+        yield {"event": "start", "chunks": len(chunks), "reduce": True, "profile": profile}
+
+        batch_timings = []
+        chunk_summaries = [""] * len(chunks)
+        completed = 0
+        with closing(self.iter_chunk_summaries(chunks, profile=profile, batch_size=batch_size, timings=batch_timings)) as results:
+            for i, summary in results:
+                chunk_summaries[i] = summary
+                completed += 1
+                yield {"event": "chunk", "index": i, "completed": completed, "total": len(chunks), "summary": summary}
+        logging.info(f"Map stage: {len(batch_timings)} batches in {sum(t['seconds'] for t in batch_timings):.2f} seconds")
+
+        chunk_summaries = [summary for summary in chunk_summaries if summary]
+        if not chunk_summaries:
+            logging.error("No valid summaries generated from chunks")
+            yield {"event": "final", "summary": ""}
+            return
+
+        combined_summary_text = " ".join(chunk_summaries)
+        logging.info("Generating final summary from combined chunks")
+
+        final_summary = self.generate_summary_for_chunk(combined_summary_text, profile)
+        self.summary_cache.put(document_cache_key, final_summary)
+
+        logging.info(f"Summarization completed in {time.time() - start_time:.2f} seconds")
+        logging.info(f"Final summary length: {len(final_summary)} characters")
+        logging.info("=" * 50)
+
+        yield {"event": "final", "summary": final_summary}
+
+    def chunk_hash(self, text: str) -> str:
+        return hashlib.sha256(self.summary_cache.normalize_text(text).encode("utf-8")).hexdigest()
+
+    def cached_chunk_states(self, text: str, profile: str = None) -> list:
+        """
+        Chunk states of `text` for the chunks whose summary is in the summary cache.
+
+        Chunks are cut the way summarize_incremental cuts a transcript, and the
+        states have the same shape as its `chunk_states`. A summary just
+        produced for `text` leaves its chunk summaries in the cache, so storing
+        these states lets the first edit regenerate only the changed chunks.
+        Chunks without a cached summary are left out.
+        """
+        if not text or not text.strip():
+            return []
+        if len(text.split()) < 2000:
+            chunks = [TextChunk(text=text, start=0, end=len(text))]
+        else:
+            chunks = self.chunker.chunk(text, max_tokens=self.tokenizer.model_max_length)
+
+        states = []
+        for chunk in chunks:
+            summary = self.summary_cache.get(self.summary_cache_key(chunk.text, profile))
+            if summary is not None:
+                states.append({"start": chunk.start, "end": chunk.end, "chunk_hash": self.chunk_hash(chunk.text), "summary": summary})
+        return states
+
+    def summarize_incremental(self, text: str, previous_text: str = None, previous_chunks: list = None) -> tuple:
+        """
+        Re-summarize an edited transcript, regenerating only the chunks that changed.
+
+        `previous_chunks` is the stored state of the last run: dicts with
+        "start", "end", "chunk_hash" and "summary", where the offsets refer to
+        `previous_text`. Unchanged chunks keep their summary, changed regions
+        are chunked and summarized again, and the final reduce step always runs.
+
+        Returns (final_summary, chunk_states, stats) where chunk_states has the
+        same shape as `previous_chunks` for the new text.
+        """
+        previous_chunks = previous_chunks or []
+        start_time = time.time()
+        stored_summaries = {chunk["chunk_hash"]: chunk["summary"] for chunk in previous_chunks}
+
+        if len(text.split()) < 2000:
+            # Short transcripts are summarized in one pass and stored as a single chunk
+            text_hash = self.chunk_hash(text)
+            summary = stored_summaries.get(text_hash)
+            reused = summary is not None
+            if not reused:
+                summary = self.generate_summary_for_chunk(text)
+            states = [{"start": 0, "end": len(text), "chunk_hash": text_hash, "summary": summary}]
+            return summary, states, {"chunks": 1, "reused": int(reused), "generated": int(not reused)}
+
+        previous_texts = [previous_text[chunk["start"]:chunk["end"]] for chunk in previous_chunks] if previous_text else []
+        chunks = self.chunker.chunk_preserving(text, previous_texts, max_tokens=self.tokenizer.model_max_length)
+        hashes = [self.chunk_hash(chunk.text) for chunk in chunks]
+
+        summaries = [stored_summaries.get(chunk_hash) for chunk_hash in hashes]
+        changed = [i for i, summary in enumerate(summaries) if summary is None]
+        logging.info(f"Incremental summarization: {len(chunks) - len(changed)}/{len(chunks)} chunks unchanged")
+
+        for i, summary in zip(changed, self.generate_summaries_batch([chunks[i] for i in changed])):
+            summaries[i] = summary
+
+        combined_summary_text = " ".join(summary for summary in summaries if summary)
+        final_summary = self.generate_summary_for_chunk(combined_summary_text) if combined_summary_text else ""
+
+        states = [
+            {"start": chunk.start, "end": chunk.end, "chunk_hash": chunk_hash, "summary": summary}
+            for chunk, chunk_hash, summary in zip(chunks, hashes, summaries)
+        ]
+        logging.info(f"Incremental summarization completed in {time.time() - start_time:.2f} seconds")
+        return final_summary, states, {
+            "chunks": len(chunks),
+            "reused": len(chunks) - len(changed),
+            "generated": len(changed)
+        }
+
+    def summarize_text(
+        self,
+        text: str,
+        progress_callback=None,
+        extractive_budget: int = None,
+        profile: str = None,
+        latency_budget: float = None
+    ) -> str:
+        """
+        Summarize a transcript, chunking and reducing it when it is long.
+
+        `progress_callback(current, total)` is called as chunks complete; the
+        final reduce step counts as the last unit of work. The callback may
+        raise SummarizationCancelled to stop the run between steps.
+        `profile` and `latency_budget` are passed to iter_summary_events.
+        """
+        def report(current, total):
+            if progress_callback:
+                progress_callback(current, total)
 
-            return final_summary
+        try:
+            if not text or not isinstance(text, str):
+                logging.error(f"Invalid input text: {type(text)}")
+                return ""
+
+            total_steps = 1
+            events = self.iter_summary_events(
+                text,
+                extractive_budget=extractive_budget,
+                profile=profile,
+                latency_budget=latency_budget
+            )
+            with closing(events):
+                for event in events:
+                    if event["event"] == "start":
+                        # The final reduce step is counted as one extra unit of progress
+                        total_steps = max(1, event["chunks"] + (1 if event["reduce"] else 0))
+                        report(0, total_steps)
+                    elif event["event"] == "chunk":
+                        report(event["completed"], total_steps)
+                    elif event["event"] == "final":
+                        report(total_steps, total_steps)
+                        return event["summary"]
+            return ""
+        except SummarizationCancelled:
+            logging.info("Summarization cancelled")
+            raise
         except Exception as e:
             logging.error(f"Error in summarization: {str(e)}")
             logging.error(f"Traceback: {traceback.format_exc()}")
             raise Exception(f"Error in summarization: {str(e)}")
 
-summarization_service = SummarizationService()
+model_registry.register("summarization", SummarizationService)
+
+def get_summarization_service() -> SummarizationService:
+    """The shared SummarizationService, loaded on first use"""
+    return model_registry.get("summarization")
+
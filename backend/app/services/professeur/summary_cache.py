@@ -0,0 +1,85 @@
+from collections import OrderedDict
+import threading
+import unicodedata
+from app.services.professeur.json_disk_cache import JsonDiskCache
+
+class SummaryCache:
+    """
+    Two-tier cache for generated summaries.
+
+    Entries are addressed by a SHA-256 of the normalized input text, the model
+    name and the generation parameters. A bounded in-memory LRU sits in front of
+    a persistent directory of JSON files, itself bounded by size on disk, so a
+    restart keeps previous results.
+    """
+
+    def __init__(self, cache_dir: str, max_memory_entries: int = 512, max_disk_bytes: int = 256 * 1024 * 1024, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max(1, max_memory_entries)
+        self.enabled = enabled
+        self.disk = JsonDiskCache(cache_dir, max_bytes=max_disk_bytes, enabled=enabled, label="summary")
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "evictions": 0,
+            "writes": 0
+        }
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        text = unicodedata.normalize("NFC", text)
+        return " ".join(text.split())
+
+    def make_key(self, text: str, model_name: str, params: dict) -> str:
+        return self.disk.hash_payload({"text": self.normalize_text(text), "model": model_name, "params": params})
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return self._memory[key]
+
+        entry = self.disk.get(key)
+        if entry is None:
+            return None
+        summary = entry["summary"]
+        with self._lock:
+            self._remember(key, summary)
+        return summary
+
+    def put(self, key: str, summary: str):
+        if not self.enabled or not summary:
+            return
+
+        with self._lock:
+            self._remember(key, summary)
+            self._counters["writes"] += 1
+        self.disk.put(key, {"summary": summary})
+
+    def _remember(self, key: str, summary: str):
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def stats(self) -> dict:
+        disk = self.disk.stats()
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        stats["disk_hits"] = disk["hits"]
+        stats["misses"] = disk["misses"]
+        stats["disk_entries"] = disk["entries"]
+        stats["disk_bytes"] = disk["bytes"]
+        stats["disk_evictions"] = disk["evictions"]
+        stats["max_disk_bytes"] = disk["max_bytes"]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        return stats
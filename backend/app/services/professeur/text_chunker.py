@@ -0,0 +1,177 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+import logging
+import re
+import threading
+
+_SENTENCE_END = re.compile(r"[^.!?…]+(?:[.!?…]+|$)")
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def _load_sentence_splitter():
+    global _nlp
+    with _nlp_lock:
+        if _nlp is not None:
+            return _nlp
+        try:
+            import spacy
+            try:
+                # Only the statistical sentence recognizer is needed, not the full parser
+                nlp = spacy.load(
+                    "fr_core_news_sm",
+                    exclude=["parser", "ner", "lemmatizer", "attribute_ruler", "morphologizer"]
+                )
+                nlp.enable_pipe("senter")
+            except Exception as e:
+                logging.warning(f"fr_core_news_sm unavailable ({str(e)}), using rule-based sentencizer")
+                nlp = spacy.blank("fr")
+                nlp.add_pipe("sentencizer")
+            _nlp = nlp
+        except ImportError:
+            logging.warning("spaCy is not installed, using regex sentence splitting")
+            _nlp = False
+        return _nlp
+
+def split_sentences(text: str) -> list:
+    """Return (start, end) character spans of the sentences in `text`"""
+    nlp = _load_sentence_splitter()
+    if nlp:
+        nlp.max_length = max(nlp.max_length, len(text) + 1)
+        doc = nlp(text)
+        spans = [(sent.start_char, sent.end_char) for sent in doc.sents]
+    else:
+        spans = [(m.start(), m.end()) for m in _SENTENCE_END.finditer(text)]
+    return [(start, end) for start, end in spans if text[start:end].strip()]
+
+@dataclass
+class TextChunk:
+    """A slice of the source text together with its ready-to-use token ids"""
+    text: str
+    start: int
+    end: int
+    token_ids: list = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.token_ids)
+
+class SentenceChunker:
+    """
+    Split a transcript into model-sized chunks that end on sentence boundaries.
+
+    The text is tokenized a single time with offset mappings; sentence spans are
+    mapped onto token positions and packed greedily into chunks of at most
+    `max_tokens` tokens (including the end-of-sequence token). Consecutive chunks
+    can share up to `overlap_tokens` tokens of trailing sentences for context.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int = 1024, overlap_tokens: int = 0):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = max(0, overlap_tokens)
+
+    def split_sentences(self, text: str) -> list:
+        return split_sentences(text)
+
+    def chunk(self, text: str, max_tokens: int = None) -> list:
+        max_tokens = max_tokens or self.max_tokens
+        if not text or not text.strip():
+            return []
+
+        encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        token_ids = encoding["input_ids"]
+        token_starts = [start for start, _ in encoding["offset_mapping"]]
+        eos = [self.tokenizer.eos_token_id] if self.tokenizer.eos_token_id is not None else []
+        budget = max_tokens - len(eos)
+
+        # Sentence starts become token boundaries, so every token belongs to exactly one sentence
+        boundaries = sorted({bisect_left(token_starts, start) for start, _ in self.split_sentences(text)})
+        boundaries = [0] + [b for b in boundaries if 0 < b < len(token_ids)] + [len(token_ids)]
+
+        units = []
+        for first, last in zip(boundaries, boundaries[1:]):
+            # A sentence longer than the budget is cut on token positions
+            for piece_start in range(first, last, budget):
+                units.append((piece_start, min(piece_start + budget, last)))
+
+        if not units:
+            return []
+
+        chunks = []
+        current = []
+        current_tokens = 0
+        for unit in units:
+            unit_tokens = unit[1] - unit[0]
+            if current and current_tokens + unit_tokens > budget:
+                chunks.append(current)
+                current = self._overlap_tail(current, budget - unit_tokens)
+                current_tokens = sum(u[1] - u[0] for u in current)
+            current.append(unit)
+            current_tokens += unit_tokens
+        if current:
+            chunks.append(current)
+
+        result = []
+        for group in chunks:
+            first_token, last_token = group[0][0], group[-1][1]
+            char_start = token_starts[first_token]
+            char_end = encoding["offset_mapping"][last_token - 1][1]
+            result.append(TextChunk(
+                text=text[char_start:char_end],
+                start=char_start,
+                end=char_end,
+                token_ids=token_ids[first_token:last_token] + eos
+            ))
+
+        logging.info(f"Text of {len(token_ids)} tokens split into {len(result)} sentence-aligned chunks")
+        return result
+
+    def chunk_preserving(self, text: str, previous_texts: list, max_tokens: int = None) -> list:
+        """
+        Chunk an edited text while keeping the chunks of a previous run that are unchanged.
+
+        Every previous chunk text still found verbatim (in order) becomes a chunk
+        again, so later boundaries do not shift after a local edit. Only the text
+        between those anchors is chunked afresh. Anchored chunks carry no token
+        ids; they are expected to be matched against stored summaries.
+        """
+        chunks = []
+        covered_end = 0
+        search_from = 0
+        for previous in previous_texts:
+            if not previous or not previous.strip():
+                continue
+            position = text.find(previous, search_from)
+            if position < 0:
+                continue
+            if position > covered_end:
+                chunks.extend(self._chunk_span(text, covered_end, position, max_tokens))
+            chunks.append(TextChunk(text=previous, start=position, end=position + len(previous)))
+            covered_end = max(covered_end, position + len(previous))
+            search_from = position + 1
+
+        chunks.extend(self._chunk_span(text, covered_end, len(text), max_tokens))
+        return chunks
+
+    def _chunk_span(self, text: str, start: int, end: int, max_tokens: int = None) -> list:
+        span = text[start:end]
+        if not span.strip():
+            return []
+        return [
+            TextChunk(text=chunk.text, start=chunk.start + start, end=chunk.end + start, token_ids=chunk.token_ids)
+            for chunk in self.chunk(span, max_tokens=max_tokens)
+        ]
+
+    def _overlap_tail(self, units: list, room: int) -> list:
+        """Trailing sentences of a finished chunk to repeat at the start of the next one"""
+        if not self.overlap_tokens:
+            return []
+        tail = []
+        tail_tokens = 0
+        for unit in reversed(units):
+            unit_tokens = unit[1] - unit[0]
+            if tail_tokens + unit_tokens > min(self.overlap_tokens, room):
+                break
+            tail.insert(0, unit)
+            tail_tokens += unit_tokens
+        return tail
@@ -0,0 +1,15 @@
+from app.services.professeur.json_disk_cache import JsonDiskCache
+
+class TranscriptionCache(JsonDiskCache):
+    """
+    Persistent cache of transcription results, bounded by total size on disk.
+
+    Entries are addressed by a SHA-256 of the audio bytes (computed while the
+    upload is streamed), the model size and the decoding options.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, enabled: bool = True):
+        super().__init__(cache_dir, max_bytes=max_bytes, enabled=enabled, label="transcription")
+
+    def make_key(self, audio_hash: str, model_size: str, options: dict) -> str:
+        return self.hash_payload({"audio": audio_hash, "model": model_size, "options": options})
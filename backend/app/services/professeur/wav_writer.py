@@ -0,0 +1,351 @@
+import json
+import logging
+import os
+import queue
+import shutil
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WAV_HEADER_SIZE = 44
+
+def wav_header(channels: int, sample_width: int, rate: int, data_bytes: int) -> bytes:
+    """Canonical 44-byte PCM WAV header"""
+    block_align = channels * sample_width
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, rate, rate * block_align, block_align, sample_width * 8)
+        + b"data" + struct.pack("<I", data_bytes)
+    )
+
+def is_pcm16_wav(header: bytes, channels: int, rate: int) -> bool:
+    """Whether `header` starts a canonical 16-bit PCM WAV file of this format, such as the recorder writes"""
+    expected = wav_header(channels, 2, rate, 0)
+    return (
+        len(header) >= WAV_HEADER_SIZE
+        and header[:4] == b"RIFF"
+        and header[8:WAV_HEADER_SIZE - 4] == expected[8:WAV_HEADER_SIZE - 4]
+    )
+
+class StreamingWavWriter:
+    """
+    Write PCM frames to a WAV file from a background thread as they are captured.
+
+    The capture thread hands frames over through a bounded queue, so memory
+    stays flat whatever the recording length. The header sizes are patched
+    every `header_interval` seconds, which keeps the file playable up to the
+    last update if the process dies, and once more on `close`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        channels: int,
+        sample_width: int,
+        rate: int,
+        max_queue_frames: int = 512,
+        header_interval: float = 5.0
+    ):
+        self.path = path
+        self.channels = channels
+        self.sample_width = sample_width
+        self.rate = rate
+        self.header_interval = header_interval
+        self.data_bytes = 0
+        self.dropped_frames = 0
+        self._queue = queue.Queue(maxsize=max(1, max_queue_frames))
+        self._file = None
+        self._thread = None
+        self._error = None
+
+    def start(self):
+        self._file = open(self.path, "wb")
+        self._file.write(wav_header(self.channels, self.sample_width, self.rate, 0))
+        self._thread = threading.Thread(target=self._run, name="wav-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, data: bytes, release=None):
+        """
+        Queue one frame without blocking; drops the frame when the disk falls behind.
+
+        The capture thread must return to the device at once: a stalled read
+        overflows the input buffer and ends the recording, which loses far
+        more than the dropped frames. The frame is kept as is, not copied:
+        `release(data)`, if given, is called once it is written or dropped,
+        after which its buffer may be reused.
+        """
+        try:
+            self._queue.put_nowait((data, release))
+        except queue.Full:
+            if release is not None:
+                release(data)
+            self.dropped_frames += 1
+            # Warn on the first drop and every 100th after it: a slow disk drops many frames in a row
+            if self.dropped_frames == 1 or self.dropped_frames % 100 == 0:
+                logger.warning(f"WAV writer queue full, dropped a frame ({self.dropped_frames} so far)")
+
+    def _run(self):
+        last_header = time.monotonic()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                data, release = item
+                self._write_frame(data)
+                if release is not None:
+                    release(data)
+                if time.monotonic() - last_header >= self.header_interval:
+                    self._patch_header()
+                    last_header = time.monotonic()
+        except Exception as e:
+            self._error = e
+            logger.error(f"Error writing {self.path}: {str(e)}")
+            # Keep draining so the capture thread never blocks on a dead writer
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if item[1] is not None:
+                    item[1](item[0])
+
+    def _write_frame(self, data: bytes):
+        self._file.write(data)
+        self.data_bytes += len(data)
+
+    def _patch_header(self):
+        position = self._file.tell()
+        self._file.seek(0)
+        self._file.write(wav_header(self.channels, self.sample_width, self.rate, self.data_bytes))
+        self._file.seek(position)
+        self._file.flush()
+
+    @property
+    def duration(self) -> float:
+        return self.data_bytes / (self.channels * self.sample_width * self.rate)
+
+    def close(self):
+        """Write the remaining frames, finalize the header and close the file"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        try:
+            if self._error is None:
+                self._patch_header()
+        finally:
+            self._file.close()
+        if self._error is not None:
+            raise self._error
+
+def journal_path(output_path: str) -> str:
+    return f"{output_path}.journal"
+
+def segments_dir(output_path: str) -> str:
+    return f"{output_path}.parts"
+
+def _fsync_dir(path: str):
+    """Persist the directory entries of newly created files (not supported on Windows)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def segment_data_bytes(path: str, block_align: int) -> int:
+    """Audio bytes of a segment, from its size on disk: whole sample frames after the header"""
+    size = os.path.getsize(path) - WAV_HEADER_SIZE
+    return max(0, size - size % block_align)
+
+def stitch_segments(output_path: str, segment_paths: list, channels: int, sample_width: int, rate: int) -> int:
+    """
+    Concatenate the audio of WAV segments into one WAV file; returns its audio bytes.
+
+    Segment sizes are read from disk rather than from their headers, so
+    segments whose header was never updated (after a crash) are stitched
+    whole. The output is written next to its destination and renamed at the
+    end, so an interrupted stitch never leaves a truncated recording behind.
+    """
+    block_align = channels * sample_width
+    sizes = [segment_data_bytes(path, block_align) for path in segment_paths]
+    data_bytes = sum(sizes)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(wav_header(channels, sample_width, rate, data_bytes))
+        for path, size in zip(segment_paths, sizes):
+            with open(path, "rb") as segment:
+                segment.seek(WAV_HEADER_SIZE)
+                remaining = size
+                while remaining:
+                    block = segment.read(min(remaining, 1024 * 1024))
+                    if not block:
+                        break
+                    out.write(block)
+                    remaining -= len(block)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, output_path)
+    _fsync_dir(os.path.dirname(output_path) or ".")
+    return data_bytes
+
+class SegmentedWavWriter(StreamingWavWriter):
+    """
+    Crash-safe variant of StreamingWavWriter for long recordings.
+
+    Audio goes to rolling WAV segments of `segment_seconds` in a
+    `<output>.parts` directory. Every `sync_interval` seconds the current
+    segment header is patched and the file is fsync'd, so a crash of the
+    process or the machine loses at most that much audio. A small JSON
+    journal next to the output records the audio format while the recording
+    is in progress. `close` stitches the segments into the output file and
+    removes the journal and the segments; if the process dies first,
+    `recover_recordings` does the same at the next start. Stitching copies
+    the whole recording, so callers that must return quickly call `finish`
+    and run `stitch` in the background.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        channels: int,
+        sample_width: int,
+        rate: int,
+        max_queue_frames: int = 512,
+        sync_interval: float = 2.0,
+        segment_seconds: float = 60.0
+    ):
+        super().__init__(path, channels, sample_width, rate, max_queue_frames=max_queue_frames, header_interval=sync_interval)
+        block_align = channels * sample_width
+        self.segment_limit = max(block_align, int(segment_seconds * rate) * block_align)
+        self.parts_dir = segments_dir(path)
+        self.segment_paths = []
+        self._segment_bytes = 0
+
+    def start(self):
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self._write_journal()
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="wav-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def _write_journal(self):
+        journal = {
+            "output": os.path.basename(self.path),
+            "channels": self.channels,
+            "sample_width": self.sample_width,
+            "rate": self.rate,
+            "started_at": time.time()
+        }
+        tmp_path = f"{journal_path(self.path)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(journal, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, journal_path(self.path))
+        _fsync_dir(os.path.dirname(self.path) or ".")
+
+    def _open_segment(self):
+        segment_path = os.path.join(self.parts_dir, f"segment_{len(self.segment_paths):05d}.wav")
+        self._file = open(segment_path, "wb")
+        self._file.write(wav_header(self.channels, self.sample_width, self.rate, 0))
+        self.segment_paths.append(segment_path)
+        self._segment_bytes = 0
+        _fsync_dir(self.parts_dir)
+
+    def _write_frame(self, data: bytes):
+        if self._segment_bytes >= self.segment_limit:
+            self._patch_header()
+            self._file.close()
+            self._open_segment()
+        self._file.write(data)
+        self._segment_bytes += len(data)
+        self.data_bytes += len(data)
+
+    def _patch_header(self):
+        position = self._file.tell()
+        self._file.seek(0)
+        self._file.write(wav_header(self.channels, self.sample_width, self.rate, self._segment_bytes))
+        self._file.seek(position)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def finish(self):
+        """Write the remaining frames and close the last segment; `data_bytes` is final afterwards"""
+        # On a write error the segments and the journal stay on disk for recovery
+        super().close()
+
+    def stitch(self):
+        """Build the output file from the finished segments, then remove the journal and the segments"""
+        stitch_segments(self.path, self.segment_paths, self.channels, self.sample_width, self.rate)
+        os.remove(journal_path(self.path))
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+    def discard(self):
+        """Remove the journal and the segments of a finished recording that holds no audio"""
+        if os.path.exists(journal_path(self.path)):
+            os.remove(journal_path(self.path))
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+    def close(self):
+        """Write the remaining frames, then stitch the segments into the output file"""
+        if self._thread is None:
+            return
+        self.finish()
+        self.stitch()
+
+def recover_recordings(recordings_dir: str, exclude: list = None) -> list:
+    """
+    Rebuild the recordings a crash left as segments and a journal.
+
+    Every `<name>.journal` in `recordings_dir` (except the outputs in
+    `exclude`, e.g. the recording in progress) has its segments stitched into
+    `<name>`, then the journal and segments are removed. Returns one dict per
+    recovered recording with its path, duration and segment count.
+    """
+    excluded = {os.path.abspath(path) for path in exclude or [] if path}
+    recovered = []
+    for name in sorted(os.listdir(recordings_dir)):
+        if not name.endswith(".journal"):
+            continue
+        journal_file = os.path.join(recordings_dir, name)
+        output_path = os.path.join(recordings_dir, name[:-len(".journal")])
+        if os.path.abspath(output_path) in excluded:
+            continue
+        try:
+            with open(journal_file, "r", encoding="utf-8") as f:
+                journal = json.load(f)
+            channels, sample_width, rate = journal["channels"], journal["sample_width"], journal["rate"]
+            parts_dir = segments_dir(output_path)
+            segment_paths = sorted(
+                os.path.join(parts_dir, segment)
+                for segment in (os.listdir(parts_dir) if os.path.isdir(parts_dir) else [])
+                if segment.endswith(".wav")
+            )
+            data_bytes = stitch_segments(output_path, segment_paths, channels, sample_width, rate) if segment_paths else 0
+            if data_bytes == 0 and os.path.exists(output_path):
+                os.remove(output_path)
+            os.remove(journal_file)
+            shutil.rmtree(parts_dir, ignore_errors=True)
+        except Exception as e:
+            logger.error(f"Error recovering {output_path}: {str(e)}")
+            continue
+
+        if data_bytes:
+            duration = data_bytes / (channels * sample_width * rate)
+            logger.info(f"Recovered {output_path} from {len(segment_paths)} segments ({duration:.1f} seconds)")
+            recovered.append({
+                "filename": output_path,
+                "duration": round(duration, 2),
+                "segments": len(segment_paths)
+            })
+    return recovered
@@ -2,9 +2,190 @@ import whisper
 import tempfile
 import os
 import time
+import logging
+import math
+import asyncio
+import functools
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import subprocess
 import shutil
+import threading
+from collections import OrderedDict
+import numpy as np
+import psutil
+import torch
+from app.core.model_registry import model_registry
+from app.services.professeur.audio_segmentation import split_at_silences
+from app.services.professeur.transcription_cache import TranscriptionCache
+from app.services.professeur.wav_writer import is_pcm16_wav, WAV_HEADER_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Uploads are copied to disk in chunks of this size, and rejected beyond the maximum size
+STT_UPLOAD_CHUNK_BYTES = int(os.getenv("STT_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+STT_MAX_UPLOAD_BYTES = int(os.getenv("STT_MAX_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+
+# Uploads are piped through ffmpeg straight into memory, except for containers that need a seekable file
+STT_PIPE_DECODING = os.getenv("STT_PIPE_DECODING", "true").lower() == "true"
+STT_PIPE_FALLBACK_EXTENSIONS = {
+    extension.strip().lower()
+    for extension in os.getenv("STT_PIPE_FALLBACK_EXTENSIONS", ".m4a,.mp4,.mov,.3gp").split(",")
+    if extension.strip()
+}
+
+# Model used when a request does not ask for one; it stays loaded for the readiness probe
+STT_DEFAULT_MODEL = os.getenv("STT_DEFAULT_MODEL", "base")
+STT_ALLOWED_MODELS = [name for name in os.getenv("STT_ALLOWED_MODELS", "tiny,base,small").split(",") if name]
+# At most this many model sizes resident at once, within this memory ceiling
+STT_MAX_LOADED_MODELS = int(os.getenv("STT_MAX_LOADED_MODELS", "2"))
+STT_MODELS_MEMORY_MB = float(os.getenv("STT_MODELS_MEMORY_MB", "4096"))
+
+# Quality levels offered to clients, mapped to model sizes
+STT_QUALITY_MODELS = {
+    "fast": "tiny",
+    "balanced": "base",
+    "accurate": "small"
+}
+
+# Approximate resident memory of each model size, used before a size has been loaded once
+WHISPER_MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 1000,
+    "medium": 3000,
+    "large": 6000
+}
+
+# Transcriptions run on a dedicated pool; requests beyond the queue depth are turned away.
+# Calls on one model are serialized (see WhisperSTT): extra workers overlap transcriptions
+# with different model sizes and the long-audio mode, never two calls on one model
+STT_WORKERS = int(os.getenv("STT_WORKERS", "1"))
+STT_MAX_QUEUE = int(os.getenv("STT_MAX_QUEUE", "4"))
+# Live transcription sessions run on their own threads, so a long upload never stalls them;
+# each session holds a slot for its whole duration. Passes on one live model copy are serialized too
+STT_LIVE_WORKERS = int(os.getenv("STT_LIVE_WORKERS", "1"))
+STT_LIVE_MAX_QUEUE = int(os.getenv("STT_LIVE_MAX_QUEUE", "1"))
+
+# Results are cached on disk by audio content hash, model size and decoding options
+STT_CACHE_ENABLED = os.getenv("STT_CACHE_ENABLED", "true").lower() == "true"
+STT_CACHE_MAX_BYTES = int(os.getenv("STT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+STT_CACHE_DIR = os.getenv(
+    "STT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "transcription_cache")
+)
+
+# Long-audio mode: recordings longer than this are split at silences and transcribed in parallel
+STT_LONG_AUDIO_MIN_SECONDS = float(os.getenv("STT_LONG_AUDIO_MIN_SECONDS", "600"))
+STT_LONG_AUDIO_WORKERS = int(os.getenv("STT_LONG_AUDIO_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+STT_SEGMENT_MIN_SECONDS = float(os.getenv("STT_SEGMENT_MIN_SECONDS", "30"))
+STT_SEGMENT_MAX_SECONDS = float(os.getenv("STT_SEGMENT_MAX_SECONDS", "120"))
+# Spoken language passed to every segment so they do not each detect it; empty means auto-detect
+STT_LANGUAGE = os.getenv("STT_LANGUAGE") or None
+
+_worker_model = None
+
+def _init_segment_worker(model_size: str, threads: int):
+    """Process pool initializer: load the model once per worker process"""
+    global _worker_model
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model_size)
+
+def _transcribe_segment(samples, language: str = None) -> dict:
+    result = _worker_model.transcribe(samples, language=language)
+    return {
+        "text": result["text"].strip(),
+        "segments": [
+            {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+            for segment in result["segments"]
+        ]
+    }
+
+class TranscriptionQueue:
+    """
+    Bounded executor for blocking transcriptions, with admission control.
+
+    A request is admitted before its upload is read and released once its
+    transcription is done, so at most `workers + max_queue` requests are in
+    flight. Extra requests are rejected at once with a 503 and a Retry-After
+    estimated from the recent processing times.
+    """
+
+    def __init__(self, workers: int, max_queue: int, thread_name_prefix: str = "stt"):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._processing_total = 0.0
+
+    def admit(self):
+        with self._lock:
+            if self._admitted >= self.workers + self.max_queue:
+                self._rejected += 1
+                retry_after = self._retry_after()
+                logger.warning(f"Transcription queue full ({self._admitted} requests), rejecting")
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many transcriptions in progress, please retry later",
+                    headers={"Retry-After": str(retry_after)}
+                )
+            self._admitted += 1
+
+    def release(self):
+        with self._lock:
+            self._admitted -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn` on the transcription pool without blocking the event loop"""
+        submitted = time.monotonic()
+
+        def task():
+            started = time.monotonic()
+            with self._lock:
+                self._running += 1
+                self._wait_total += started - submitted
+                self._wait_max = max(self._wait_max, started - submitted)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._processing_total += time.monotonic() - started
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(task))
+
+    def _retry_after(self) -> int:
+        mean_processing = self._processing_total / self._completed if self._completed else 30.0
+        return max(1, math.ceil(mean_processing * math.ceil(self._admitted / self.workers)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._admitted,
+                "running": self._running,
+                "queue_depth": max(0, self._admitted - self._running),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "mean_wait_seconds": round(self._wait_total / self._completed, 3) if self._completed else 0.0,
+                "max_wait_seconds": round(self._wait_max, 3),
+                "mean_processing_seconds": round(self._processing_total / self._completed, 3) if self._completed else 0.0
+            }
+
+transcription_queue = TranscriptionQueue(STT_WORKERS, STT_MAX_QUEUE)
+live_transcription_queue = TranscriptionQueue(STT_LIVE_WORKERS, STT_LIVE_MAX_QUEUE, thread_name_prefix="stt-live")
+transcription_cache = TranscriptionCache(STT_CACHE_DIR, max_bytes=STT_CACHE_MAX_BYTES, enabled=STT_CACHE_ENABLED)
 
 class WhisperSTT:
     def __init__(self, model_size="base"):
@@ -26,53 +207,478 @@ class WhisperSTT:
                 detail="FFmpeg is not installed. Please install FFmpeg using 'choco install ffmpeg'"
             )
             
+        self.model_size = model_size
         self.model = whisper.load_model(model_size)
+        # Whisper installs its key/value cache hooks on the model for every call:
+        # two calls running at once on one model corrupt each other's cache
+        self.model_lock = threading.Lock()
+        self._live_model = None
+        self.live_model_lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._closed = False
         
-    def transcribe(self, audio_path):
+    def transcribe(self, audio, long_audio=None):
         """
         Transcribe audio to text using Whisper.
         
         Args:
-            audio_path (str): Path to the audio file to transcribe
+            audio (str or np.ndarray): Path to the audio file to transcribe, or
+                16 kHz mono float32 samples already decoded
+            long_audio (bool): Force (True) or disable (False) the parallel
+                long-audio mode; by default it is used for recordings longer
+                than STT_LONG_AUDIO_MIN_SECONDS when several workers are configured
             
         Returns:
             dict: A dictionary containing:
                 - text: The transcribed text
+                - segments: Timestamped segments (start and end in seconds)
                 - processing_time: Time taken to process the audio
         """
         start_time = time.time()
-        result = self.model.transcribe(audio_path)
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        duration = len(audio) / whisper.audio.SAMPLE_RATE
+
+        if long_audio is None:
+            long_audio = STT_LONG_AUDIO_WORKERS > 1 and duration > STT_LONG_AUDIO_MIN_SECONDS
+
+        if long_audio:
+            result = self.transcribe_long_audio(audio)
+        else:
+            result = self._transcribe_in_process(audio)
         end_time = time.time()
         
         return {
             "text": result["text"],
+            "segments": result["segments"],
             "processing_time": end_time - start_time
         }
 
+    def _transcribe_in_process(self, audio) -> dict:
+        with self.model_lock:
+            result = self.model.transcribe(audio, language=STT_LANGUAGE)
+        return {
+            "text": result["text"],
+            "segments": [
+                {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+                for segment in result["segments"]
+            ]
+        }
+
+    def close(self):
+        """Stop the long-audio workers for good; running segments still finish"""
+        with self._pool_lock:
+            self._closed = True
+            self._live_model = None
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def get_live_model(self):
+        """
+        Copy of the model for live transcription, loaded on first use.
+
+        Live passes hold `live_model_lock` rather than `model_lock`, so they
+        never wait behind a long request transcription.
+        """
+        with self._pool_lock:
+            if self._live_model is None:
+                logger.info(f"Loading a copy of Whisper model '{self.model_size}' for live transcription")
+                self._live_model = whisper.load_model(self.model_size)
+            return self._live_model
+
+    @property
+    def live_models(self) -> int:
+        """Copies of the model loaded for live transcription"""
+        return 1 if self._live_model is not None else 0
+
+    @property
+    def pool_workers(self) -> int:
+        """Worker processes currently running, each holding its own copy of the model"""
+        return STT_LONG_AUDIO_WORKERS if self._pool is not None else 0
+
+    def _get_pool(self):
+        """The long-audio worker pool, started on first use; None once the model is closed"""
+        with self._pool_lock:
+            if self._closed:
+                return None
+            if self._pool is None:
+                # Split the cores between workers instead of letting each use all of them
+                threads = max(1, (os.cpu_count() or 1) // STT_LONG_AUDIO_WORKERS)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=STT_LONG_AUDIO_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_segment_worker,
+                    initargs=(self.model_size, threads)
+                )
+                logger.info(f"Started {STT_LONG_AUDIO_WORKERS} transcription workers with {threads} threads each")
+            return self._pool
+
+    def transcribe_long_audio(self, audio) -> dict:
+        """
+        Split 16 kHz audio at silences and transcribe the segments in parallel.
+
+        Segment texts are joined back in order, and the timestamps of their
+        inner segments are shifted to the position of the segment in the recording.
+        """
+        pool = self._get_pool()
+        if pool is None:
+            # An evicted model finishes its requests in process rather than start workers nobody will stop
+            logger.info(f"Whisper model '{self.model_size}' was evicted, transcribing without long-audio workers")
+            return self._transcribe_in_process(audio)
+
+        sample_rate = whisper.audio.SAMPLE_RATE
+        bounds = split_at_silences(
+            audio,
+            sample_rate,
+            min_seconds=STT_SEGMENT_MIN_SECONDS,
+            max_seconds=STT_SEGMENT_MAX_SECONDS
+        )
+        logger.info(f"Long-audio mode: {len(bounds)} segments over {len(audio) / sample_rate:.0f} seconds")
+
+        futures = [pool.submit(_transcribe_segment, audio[start:end], STT_LANGUAGE) for start, end in bounds]
+
+        texts = []
+        segments = []
+        for (start, end), future in zip(bounds, futures):
+            result = future.result()
+            offset = start / sample_rate
+            if result["text"]:
+                texts.append(result["text"])
+            segments.extend(
+                {"start": round(offset + segment["start"], 2), "end": round(offset + segment["end"], 2), "text": segment["text"]}
+                for segment in result["segments"]
+            )
+
+        return {"text": " ".join(texts), "segments": segments}
+
 class WhisperService:
     def __init__(self, model_size="base"):
         # Initialize the WhisperSTT model
+        self.model_size = model_size
         self.stt_model = WhisperSTT(model_size=model_size)
     
-    async def transcribe_audio(self, audio_file: UploadFile) -> dict:
+    async def save_upload(self, audio_file: UploadFile) -> tuple:
+        """
+        Copy an upload to a temporary file in fixed-size chunks.
+
+        Returns the path of the file and the SHA-256 of its content, hashed
+        while copying so the audio is read only once.
+
+        Memory stays bounded by STT_UPLOAD_CHUNK_BYTES whatever the file size.
+        Uploads larger than STT_MAX_UPLOAD_BYTES are rejected with a 413 and
+        nothing is left on disk.
+        """
+        self._check_declared_size(audio_file)
+
+        suffix = os.path.splitext(audio_file.filename or "")[1]
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        try:
+            with temp_file:
+                digest = hashlib.sha256()
+                written = 0
+                while True:
+                    chunk = await audio_file.read(STT_UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > STT_MAX_UPLOAD_BYTES:
+                        raise HTTPException(status_code=413, detail=f"Audio file exceeds the {STT_MAX_UPLOAD_BYTES} byte limit")
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            return temp_file.name, digest.hexdigest()
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+
+    @staticmethod
+    def _check_declared_size(audio_file: UploadFile):
+        declared_size = getattr(audio_file, "size", None)
+        if declared_size is not None and declared_size > STT_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Audio file exceeds the {STT_MAX_UPLOAD_BYTES} byte limit")
+
+    @staticmethod
+    def can_pipe(filename: str) -> bool:
+        """Whether ffmpeg can decode this format from a non-seekable stream"""
+        return STT_PIPE_DECODING and os.path.splitext(filename or "")[1].lower() not in STT_PIPE_FALLBACK_EXTENSIONS
+
+    async def decode_upload(self, audio_file: UploadFile) -> tuple:
+        """
+        Decode an upload in memory by piping it through ffmpeg.
+
+        The upload is written to ffmpeg's stdin chunk by chunk while its
+        16 kHz mono float32 output is collected from stdout, so decoding
+        overlaps with the upload and nothing touches the disk. Returns the
+        samples and the SHA-256 of the uploaded bytes.
+
+        16 kHz mono 16-bit WAV files, as the recorder writes them by default
+        (served by download-recording?format=wav with RECORDING_KEEP_STT_WAV
+        or RECORDING_CODEC=wav), are already in Whisper's format and are read
+        without ffmpeg.
+        """
+        self._check_declared_size(audio_file)
+
+        first_chunk = await audio_file.read(STT_UPLOAD_CHUNK_BYTES)
+        if is_pcm16_wav(first_chunk, 1, whisper.audio.SAMPLE_RATE):
+            return await self._read_native_wav(audio_file, first_chunk)
+
+        process = subprocess.Popen(
+            [
+                "ffmpeg", "-loglevel", "error", "-threads", "0",
+                "-i", "pipe:0",
+                "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(whisper.audio.SAMPLE_RATE),
+                "pipe:1"
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        output = bytearray()
+        errors = bytearray()
+
+        def drain(stream, buffer: bytearray):
+            for block in iter(lambda: stream.read(1024 * 1024), b""):
+                buffer.extend(block)
+
+        readers = [
+            threading.Thread(target=drain, args=(process.stdout, output), daemon=True),
+            threading.Thread(target=drain, args=(process.stderr, errors), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+
+        digest = hashlib.sha256()
+        written = 0
+        chunk = first_chunk
+        try:
+            while chunk:
+                written += len(chunk)
+                if written > STT_MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Audio file exceeds the {STT_MAX_UPLOAD_BYTES} byte limit")
+                digest.update(chunk)
+                try:
+                    # A full pipe blocks until ffmpeg catches up: write off the event loop
+                    await run_in_threadpool(process.stdin.write, chunk)
+                except BrokenPipeError:
+                    # ffmpeg gave up on the input; its exit code and stderr say why
+                    break
+                chunk = await audio_file.read(STT_UPLOAD_CHUNK_BYTES)
+            try:
+                await run_in_threadpool(process.stdin.close)
+            except BrokenPipeError:
+                pass
+            return_code = await run_in_threadpool(process.wait)
+            for reader in readers:
+                await run_in_threadpool(reader.join)
+        except BaseException:
+            # Reap ffmpeg right away: a killed child exits almost immediately and would stay a zombie otherwise
+            process.kill()
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            process.wait()
+            raise
+
+        if return_code != 0:
+            detail = errors.decode("utf-8", errors="replace").strip()[-500:]
+            raise HTTPException(status_code=400, detail=f"Could not decode audio: {detail}")
+
+        return np.frombuffer(output, dtype=np.float32), digest.hexdigest()
+
+    async def _read_native_wav(self, audio_file: UploadFile, first_chunk: bytes) -> tuple:
+        """
+        Samples of a 16 kHz mono 16-bit WAV upload, converted with NumPy.
+
+        Each chunk is converted as it arrives and only the float32 samples
+        are kept, so memory peaks at the size of the output, as with ffmpeg.
+        """
+        digest = hashlib.sha256()
+        output = bytearray()
+        scale = np.float32(1 / 32768.0)
+        # The size in the header may be stale (recovered recordings): read up to the end of the file
+        chunk = first_chunk[WAV_HEADER_SIZE:]
+        digest.update(first_chunk[:WAV_HEADER_SIZE])
+        written = WAV_HEADER_SIZE
+        carry = b""
+        while chunk:
+            written += len(chunk)
+            if written > STT_MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=f"Audio file exceeds the {STT_MAX_UPLOAD_BYTES} byte limit")
+            digest.update(chunk)
+            if carry:
+                chunk = carry + chunk
+            # A chunk may end in the middle of a sample: keep the odd byte for the next one
+            carry = chunk[len(chunk) - len(chunk) % 2:]
+            samples = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2).astype(np.float32)
+            np.multiply(samples, scale, out=samples)
+            output += memoryview(samples).cast("B")
+            chunk = await audio_file.read(STT_UPLOAD_CHUNK_BYTES)
+
+        return np.frombuffer(output, dtype=np.float32), digest.hexdigest()
+
+    @staticmethod
+    def decoding_options(long_audio=None) -> dict:
+        """Settings that change the transcription of a given recording, part of the cache key"""
+        return {
+            "language": STT_LANGUAGE,
+            "long_audio": long_audio,
+            "parallel": STT_LONG_AUDIO_WORKERS > 1,
+            "long_audio_min_seconds": STT_LONG_AUDIO_MIN_SECONDS,
+            "segment_seconds": [STT_SEGMENT_MIN_SECONDS, STT_SEGMENT_MAX_SECONDS]
+        }
+
+    async def transcribe_audio(self, audio_file: UploadFile, long_audio=None) -> dict:
+        # Turn the request away before reading the upload when the queue is full
+        transcription_queue.admit()
+        temp_path = None
         try:
-            # Create a temporary file to store the uploaded audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(audio_file.filename)[1]) as temp_file:
-                # Write the uploaded file to the temporary file
-                content = await audio_file.read()
-                temp_file.write(content)
-                temp_file.flush()
-                
-                # Ensure the file is closed before processing
-                temp_file.close()
-                
-                # Transcribe the audio file using our WhisperSTT model
-                result = self.stt_model.transcribe(temp_file.name)
-                
-                # Clean up the temporary file
-                os.unlink(temp_file.name)
-                
-                return result
-                
+            if self.can_pipe(audio_file.filename):
+                audio, audio_hash = await self.decode_upload(audio_file)
+            else:
+                # Containers such as MP4 need a seekable input: go through a temporary file
+                temp_path, audio_hash = await self.save_upload(audio_file)
+                audio = temp_path
+
+            cache_key = transcription_cache.make_key(audio_hash, self.model_size, self.decoding_options(long_audio))
+            cached_result = transcription_cache.get(cache_key)
+            if cached_result is not None:
+                logger.info(f"Transcription cache hit for {audio_file.filename}")
+                return {**cached_result, "cached": True}
+
+            # Transcribe the audio file using our WhisperSTT model, off the event loop
+            result = await transcription_queue.run(self.stt_model.transcribe, audio, long_audio=long_audio)
+            transcription_cache.put(cache_key, result)
+            return {**result, "cached": False}
+        except HTTPException:
+            raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}") 
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
+        finally:
+            # Clean up the temporary file, even when transcription failed
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+            transcription_queue.release()
+
+class WhisperModelPool:
+    """
+    Whisper services of several model sizes, loaded on demand.
+
+    The default size is the "whisper" entry of the model registry and is never
+    evicted. Other sizes are kept in LRU order: before one is loaded, the least
+    recently used ones are dropped until at most `max_models` sizes are
+    resident and the expected memory fits under `memory_mb`. A dropped model
+    is freed once the requests still using it are done. The long-audio
+    worker processes of a size and its live transcription copy count
+    towards the memory ceiling, one model copy each, while they are loaded.
+    """
+
+    def __init__(self, default_size: str, allowed_sizes: list, max_models: int, memory_mb: float):
+        self.default_size = default_size
+        self.allowed_sizes = allowed_sizes
+        self.max_models = max(1, max_models)
+        self.memory_mb = memory_mb
+        self._services = OrderedDict()
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._load_locks = {size: threading.Lock() for size in set(allowed_sizes) | {default_size}}
+        self._loads = 0
+        self._evictions = 0
+
+    def resolve(self, model_size: str = None, quality: str = None) -> str:
+        """Model size for a request: explicit size first, then quality level, then the default"""
+        if not model_size and quality:
+            if quality not in STT_QUALITY_MODELS:
+                raise HTTPException(status_code=400, detail=f"quality must be one of: {', '.join(STT_QUALITY_MODELS)}")
+            model_size = STT_QUALITY_MODELS[quality]
+        if not model_size:
+            return self.default_size
+        if model_size not in self._load_locks:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Model size '{model_size}' is not available, use one of: {', '.join(sorted(self._load_locks))}"
+            )
+        return model_size
+
+    def get(self, model_size: str) -> WhisperService:
+        if model_size == self.default_size:
+            return model_registry.get("whisper")
+
+        with self._lock:
+            service = self._services.get(model_size)
+            if service is not None:
+                self._services.move_to_end(model_size)
+                return service
+
+        with self._load_locks[model_size]:
+            with self._lock:
+                service = self._services.get(model_size)
+                if service is not None:
+                    self._services.move_to_end(model_size)
+                    return service
+                self._make_room(self._expected_memory(model_size))
+
+            logger.info(f"Loading Whisper model '{model_size}'")
+            process = psutil.Process(os.getpid())
+            rss_before = process.memory_info().rss
+            service = WhisperService(model_size=model_size)
+            loaded_mb = (process.memory_info().rss - rss_before) / 1024 / 1024
+
+            with self._lock:
+                # Concurrent loads blur the RSS difference; fall back to the table when it is implausible
+                if loaded_mb > 0:
+                    self._memory[model_size] = loaded_mb
+                self._services[model_size] = service
+                self._loads += 1
+            return service
+
+    def _expected_memory(self, model_size: str) -> float:
+        model_mb = self._memory.get(model_size, WHISPER_MODEL_MEMORY_MB.get(model_size, 1000))
+        if model_size == self.default_size:
+            service = model_registry.get_if_loaded("whisper")
+        else:
+            service = self._services.get(model_size)
+        copies = service.stt_model.pool_workers + service.stt_model.live_models if service is not None else 0
+        return model_mb * (1 + copies)
+
+    def _resident(self) -> list:
+        resident = list(self._services)
+        if model_registry.get_if_loaded("whisper") is not None:
+            resident.append(self.default_size)
+        return resident
+
+    def _make_room(self, needed_mb: float):
+        """Evict least recently used sizes until one more model of `needed_mb` fits"""
+        while self._services:
+            resident = self._resident()
+            used_mb = sum(self._expected_memory(size) for size in resident)
+            if len(resident) < self.max_models and used_mb + needed_mb <= self.memory_mb:
+                return
+            size, service = self._services.popitem(last=False)
+            service.stt_model.close()
+            self._evictions += 1
+            logger.info(f"Evicted Whisper model '{size}' to make room")
+
+    def stats(self) -> dict:
+        with self._lock:
+            resident = self._resident()
+            return {
+                "default": self.default_size,
+                "allowed": self.allowed_sizes,
+                "quality": STT_QUALITY_MODELS,
+                "loaded": resident,
+                "max_models": self.max_models,
+                "memory_mb": self.memory_mb,
+                "expected_memory_mb": round(sum(self._expected_memory(size) for size in resident), 1),
+                "loads": self._loads,
+                "evictions": self._evictions
+            }
+
+model_registry.register("whisper", lambda: WhisperService(model_size=STT_DEFAULT_MODEL))
+
+whisper_models = WhisperModelPool(STT_DEFAULT_MODEL, STT_ALLOWED_MODELS, STT_MAX_LOADED_MODELS, STT_MODELS_MEMORY_MB)
+
+def get_whisper_service(model_size: str = None) -> WhisperService:
+    """The shared WhisperService of a model size (the default one if None), loaded on first use"""
+    return whisper_models.get(model_size or STT_DEFAULT_MODEL)
@@ -31,7 +31,10 @@ def get_current_user(
             detail="Invalid authorization header format. Expected 'Bearer <token>'"
         )
     
-    token = authorization[len(AUTH_PREFIX):]
+    return authenticate_token(authorization[len(AUTH_PREFIX):], session)
+
+def authenticate_token(token: str, session: Session) -> UserOutput:
+    """Resolve a JWT to its user; also used by WebSocket routes, which pass the token as a query parameter"""
     payload = AuthHandler.decode_jwt(token=token)
 
     if not payload:
@@ -0,0 +1,91 @@
+"""
+Latency and quality of the extractive pre-reduction stage.
+
+Each transcript is summarized once without the extractive stage and once per
+token budget. The report gives wall-clock time, the speedup, how much text
+reached the abstractive model, and ROUGE of every reduced summary against the
+unreduced one (and against a reference summary when one is given).
+
+Run from the backend directory:
+    python -m benchmarks.extractive_benchmark lecture.txt --budgets 2048 4096
+"""
+import os
+
+# Measure generation, not the caches or the cross-request scheduler
+os.environ["SUMMARY_CACHE_ENABLED"] = "false"
+os.environ["SUMMARIZATION_SCHEDULER_ENABLED"] = "false"
+
+import argparse
+import json
+import logging
+import time
+from app.services.professeur.summarization_service import get_summarization_service
+from benchmarks.rouge import rouge_scores
+
+def run(text_files: list, budgets: list, reference_files: list = None) -> dict:
+    service = get_summarization_service()
+    results = []
+
+    for index, path in enumerate(text_files):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        reference = None
+        if reference_files and index < len(reference_files):
+            with open(reference_files[index], "r", encoding="utf-8") as f:
+                reference = f.read()
+
+        input_tokens = len(service.tokenizer(text, add_special_tokens=False)["input_ids"])
+        start_time = time.time()
+        full_summary = service.summarize_text(text, extractive_budget=0)
+        full_seconds = time.time() - start_time
+
+        entry = {
+            "file": path,
+            "input_tokens": input_tokens,
+            "full": {"seconds": round(full_seconds, 3), "summary": full_summary},
+            "reduced": []
+        }
+        if reference:
+            entry["full"]["rouge_vs_reference"] = rouge_scores(full_summary, reference)
+
+        for budget in budgets:
+            reduction_start = time.time()
+            reduced_text = service.extractive_reduce(text, budget)
+            reduction_seconds = time.time() - reduction_start
+
+            start_time = time.time()
+            summary = service.summarize_text(text, extractive_budget=budget)
+            seconds = time.time() - start_time
+
+            reduced = {
+                "budget": budget,
+                "kept_tokens": len(service.tokenizer(reduced_text, add_special_tokens=False)["input_ids"]),
+                "extractive_seconds": round(reduction_seconds, 3),
+                "seconds": round(seconds, 3),
+                "speedup": round(full_seconds / seconds, 2) if seconds else None,
+                "rouge_vs_full": rouge_scores(summary, full_summary),
+                "summary": summary
+            }
+            if reference:
+                reduced["rouge_vs_reference"] = rouge_scores(summary, reference)
+            entry["reduced"].append(reduced)
+
+        results.append(entry)
+
+    return {"model": service.model_name, "backend": service.backend.name, "results": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the extractive pre-reduction stage")
+    parser.add_argument("text_files", nargs="+", help="UTF-8 transcripts to summarize")
+    parser.add_argument("--budgets", nargs="+", type=int, default=[2048, 4096], help="Token budgets to compare")
+    parser.add_argument("--references", nargs="*", help="Reference summaries, in the same order as the transcripts")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = json.dumps(run(args.text_files, args.budgets, args.references), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
@@ -0,0 +1,173 @@
+"""
+Capture-thread mixing benchmark: AudioMixer against the previous int16 mixer.
+
+Both mixers get the same pairs of 1024-frame blocks (stereo 44.1 kHz and
+mono 16 kHz, the capture formats of the recorder) at a normal level and at
+a level where the two sources together exceed full scale. The JSON report
+gives, per mixer and case: per-block latency percentiles (for AudioMixer,
+mixing plus handing the output buffer back, as the WAV writer does), bytes and Python
+objects of temporary memory per block (tracemalloc peak), garbage collections
+during the run, and the error against an ideal float mix, including how many samples
+wrapped around to the opposite sign.
+
+Run from the backend directory:
+    python -m benchmarks.mixer_benchmark --blocks 20000 --output report.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+from app.services.professeur.audio_mixer import AudioMixer
+
+FRAMES = 1024
+CAPTURE_FORMATS = {"stereo_44100": 2, "mono_16000": 1}
+# Peak level of each source, as a fraction of full scale
+LEVELS = {"normal": 0.3, "hot": 0.8}
+
+def percentiles(values: list) -> dict:
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "mean": round(float(values.mean()), 2)
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def legacy_mix(mix_data, mic_data):
+    """The mixer the recorder used before AudioMixer, kept as the baseline"""
+    try:
+        mix_array = np.frombuffer(mix_data, dtype=np.int16)
+        mic_array = np.frombuffer(mic_data, dtype=np.int16)
+        min_length = min(len(mix_array), len(mic_array))
+        mix_array = mix_array[:min_length]
+        mic_array = mic_array[:min_length]
+        mixed = np.clip(mix_array + mic_array, -32768, 32767).astype(np.int16)
+        return mixed.tobytes()
+    except Exception:
+        return mix_data
+
+def make_blocks(channels: int, level: float, count: int, seed: int = 0) -> list:
+    """Pairs of (system, microphone) blocks: tones plus noise at `level` of full scale"""
+    rng = np.random.default_rng(seed)
+    samples = FRAMES * channels
+    t = np.arange(samples * count, dtype=np.float64) / samples
+    system = 0.7 * np.sin(2 * np.pi * 3.1 * t) + 0.3 * rng.uniform(-1, 1, len(t))
+    microphone = 0.7 * np.sin(2 * np.pi * 1.7 * t + 1.0) + 0.3 * rng.uniform(-1, 1, len(t))
+    system = (system * level * 32767).astype(np.int16)
+    microphone = (microphone * level * 32767).astype(np.int16)
+    return [
+        (system[i * samples:(i + 1) * samples].tobytes(), microphone[i * samples:(i + 1) * samples].tobytes())
+        for i in range(count)
+    ]
+
+def mix_quality(mix, blocks: list, release=None) -> dict:
+    """Error against the unclipped float sum, over the samples the sum keeps within full scale"""
+    errors = []
+    wrapped = 0
+    for system, microphone in blocks:
+        ideal = np.frombuffer(system, dtype=np.int16).astype(np.float64) + np.frombuffer(microphone, dtype=np.int16)
+        block = mix(system, microphone)
+        mixed = np.frombuffer(bytes(block), dtype=np.int16).astype(np.float64)
+        if release is not None:
+            release(block)
+        wrapped += int(np.count_nonzero((ideal * mixed < 0) & (np.abs(ideal) > 1024)))
+        in_range = np.abs(ideal) <= 32767
+        errors.append(np.abs(mixed - ideal)[in_range])
+    errors = np.concatenate(errors)
+    return {
+        "wrapped_samples": wrapped,
+        "max_abs_error": round(float(errors.max()), 1) if len(errors) else 0.0,
+        "mean_abs_error": round(float(errors.mean()), 3) if len(errors) else 0.0
+    }
+
+def run_mixer(mix, blocks: list, release=None) -> dict:
+    quality = mix_quality(mix, blocks[:500], release)
+    if release is not None:
+        def mix(system, microphone, mix=mix):
+            release(mix(system, microphone))
+
+    # Warm-up: first-call allocations are not measured
+    for system, microphone in blocks[:100]:
+        mix(system, microphone)
+
+    timings_us = []
+    gc_before = sum(stats["collections"] for stats in gc.get_stats())
+    for system, microphone in blocks:
+        start_time = time.perf_counter_ns()
+        mix(system, microphone)
+        timings_us.append((time.perf_counter_ns() - start_time) / 1000)
+    gc_collections = sum(stats["collections"] for stats in gc.get_stats()) - gc_before
+
+    # Allocations are traced in a separate pass: tracemalloc slows every call down
+    sample = blocks[:1000]
+    temporary_bytes = []
+    tracemalloc.start()
+    for system, microphone in sample:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        mix(system, microphone)
+        temporary_bytes.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    return {
+        "block_us": percentiles(timings_us),
+        "gc_collections": gc_collections,
+        "temporary_bytes_per_block": round(float(np.mean(temporary_bytes)), 1),
+        "quality": quality
+    }
+
+def run(count: int) -> dict:
+    results = []
+    for format_name, channels in CAPTURE_FORMATS.items():
+        for level_name, level in LEVELS.items():
+            blocks = make_blocks(channels, level, count)
+            mixer = AudioMixer(block_samples=FRAMES * channels)
+            results.append({
+                "format": format_name,
+                "level": level_name,
+                "legacy": run_mixer(legacy_mix, blocks),
+                "audio_mixer": run_mixer(mixer.mix, blocks, release=mixer.release)
+            })
+            legacy_p50 = results[-1]["legacy"]["block_us"]["p50"]
+            mixer_p50 = results[-1]["audio_mixer"]["block_us"]["p50"]
+            results[-1]["speedup"] = round(legacy_p50 / mixer_p50, 3) if mixer_p50 else None
+
+    return {
+        "commit": git_commit(),
+        "numpy": np.__version__,
+        "cpu": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "blocks": count,
+        "frames_per_block": FRAMES,
+        "results": results
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark AudioMixer against the previous capture-thread mixer")
+    parser.add_argument("--blocks", type=int, default=20000, help="Blocks mixed per mixer and case")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run(max(1000, args.blocks))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
@@ -0,0 +1,45 @@
+"""Dependency-free ROUGE-1, ROUGE-2 and ROUGE-L F1 scores for benchmark reports."""
+from collections import Counter
+import re
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.lower())
+
+def _f1(overlap: int, candidate_total: int, reference_total: int) -> float:
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+def rouge_n(candidate: list, reference: list, n: int) -> float:
+    candidate_ngrams = Counter(tuple(candidate[i:i + n]) for i in range(len(candidate) - n + 1))
+    reference_ngrams = Counter(tuple(reference[i:i + n]) for i in range(len(reference) - n + 1))
+    overlap = sum((candidate_ngrams & reference_ngrams).values())
+    return _f1(overlap, sum(candidate_ngrams.values()), sum(reference_ngrams.values()))
+
+def rouge_l(candidate: list, reference: list) -> float:
+    if not candidate or not reference:
+        return 0.0
+    # Longest common subsequence with a single rolling row
+    previous = [0] * (len(reference) + 1)
+    for candidate_token in candidate:
+        current = [0]
+        for j, reference_token in enumerate(reference, 1):
+            if candidate_token == reference_token:
+                current.append(previous[j - 1] + 1)
+            else:
+                current.append(max(previous[j], current[j - 1]))
+        previous = current
+    return _f1(previous[-1], len(candidate), len(reference))
+
+def rouge_scores(candidate: str, reference: str) -> dict:
+    candidate_tokens = tokenize(candidate)
+    reference_tokens = tokenize(reference)
+    return {
+        "rouge1": round(rouge_n(candidate_tokens, reference_tokens, 1), 4),
+        "rouge2": round(rouge_n(candidate_tokens, reference_tokens, 2), 4),
+        "rougeL": round(rouge_l(candidate_tokens, reference_tokens), 4)
+    }
@@ -0,0 +1,254 @@
+"""
+Reproducible latency and quality benchmark of SummarizationService.
+
+Every transcript of the bundled French corpus (benchmarks/corpus: a short
+lecture, one that fills a single 1024-token chunk and a multi-chunk one) is
+summarized with `summarize_text` under each configuration, `--repeats` times
+after a warm-up run. The JSON report gives, per transcript and configuration:
+tokenization and chunking time, the time and output tokens/sec of every
+generate call, p50/p95 end-to-end latency, peak RSS during the runs and
+ROUGE against the reference summary. Reports of two commits can be compared
+with `--baseline`.
+
+Run from the backend directory:
+    python -m benchmarks.summarization_benchmark --profiles fast quality --output report.json
+"""
+import os
+
+# Measure generation, not the caches or the cross-request scheduler
+os.environ["SUMMARY_CACHE_ENABLED"] = "false"
+os.environ["SUMMARIZATION_SCHEDULER_ENABLED"] = "false"
+
+import argparse
+import glob
+import json
+import logging
+import platform
+import subprocess
+import threading
+import time
+import numpy as np
+import psutil
+import torch
+from app.services.professeur.summarization_service import get_summarization_service
+from app.services.professeur.generation_profiles import GENERATION_PROFILES, DEFAULT_GENERATION_PROFILE
+from benchmarks.rouge import rouge_scores
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+def load_corpus(corpus_dir: str = CORPUS_DIR) -> list:
+    """(name, transcript, reference) for every <name>.txt with a <name>.reference.txt next to it"""
+    documents = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.txt"))):
+        if path.endswith(".reference.txt"):
+            continue
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        reference = None
+        reference_path = os.path.join(corpus_dir, f"{name}.reference.txt")
+        if os.path.exists(reference_path):
+            with open(reference_path, "r", encoding="utf-8") as f:
+                reference = f.read()
+        documents.append((name, text, reference))
+    return documents
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "mean": round(float(values.mean()), 2),
+        "min": round(float(values.min()), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+class GenerateRecorder:
+    """Time every generate call of an inference backend while recording is on"""
+
+    def __init__(self, backend, pad_token_id: int):
+        self.backend = backend
+        self.pad_token_id = pad_token_id
+        self.calls = []
+        self.recording = False
+        self._generate = backend.generate
+        backend.generate = self._timed_generate
+
+    def _timed_generate(self, input_ids, attention_mask, **kwargs):
+        start_time = time.perf_counter()
+        output_ids = self._generate(input_ids, attention_mask, **kwargs)
+        seconds = time.perf_counter() - start_time
+        if self.recording:
+            self.calls.append({
+                "batch": int(input_ids.shape[0]),
+                "input_tokens": int(input_ids.shape[-1]),
+                "output_tokens": int((output_ids != self.pad_token_id).sum()),
+                "seconds": seconds
+            })
+        return output_ids
+
+class PeakRssSampler:
+    """Sample the resident set size of this process in a background thread"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+def run_configuration(service, recorder, text: str, reference: str, profile: str, extractive_budget: int, repeats: int) -> dict:
+    # Warm-up run: first-call allocations and lazy initialization are not measured
+    service.summarize_text(text, profile=profile, extractive_budget=extractive_budget)
+
+    latencies_ms = []
+    recorder.calls = []
+    recorder.recording = True
+    with PeakRssSampler() as rss:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            summary = service.summarize_text(text, profile=profile, extractive_budget=extractive_budget)
+            latencies_ms.append((time.perf_counter() - start_time) * 1000)
+    recorder.recording = False
+
+    calls = recorder.calls
+    generate_seconds = sum(call["seconds"] for call in calls)
+    output_tokens = sum(call["output_tokens"] for call in calls)
+    result = {
+        "profile": profile,
+        "extractive_budget": extractive_budget,
+        "latency_ms": percentiles(latencies_ms),
+        "generate": {
+            "calls_per_run": len(calls) // repeats,
+            "call_ms": percentiles([call["seconds"] * 1000 for call in calls]),
+            "output_tokens_per_run": output_tokens // repeats,
+            "tokens_per_second": round(output_tokens / generate_seconds, 2) if generate_seconds else None
+        },
+        "peak_rss_mb": round(rss.peak / 1024 / 1024, 1),
+        "summary": summary
+    }
+    if reference:
+        result["rouge"] = rouge_scores(summary, reference)
+    return result
+
+def run(profiles: list, extractive_budgets: list, repeats: int, corpus_dir: str = CORPUS_DIR) -> dict:
+    service = get_summarization_service()
+    recorder = GenerateRecorder(service.backend, service.tokenizer.pad_token_id)
+    results = []
+
+    for name, text, reference in load_corpus(corpus_dir):
+        start_time = time.perf_counter()
+        input_tokens = len(service.tokenizer(text)["input_ids"])
+        tokenization_ms = (time.perf_counter() - start_time) * 1000
+
+        start_time = time.perf_counter()
+        chunks = service.chunk_text_by_tokenization(text, max_tokens=service.tokenizer.model_max_length)
+        chunking_ms = (time.perf_counter() - start_time) * 1000
+
+        entry = {
+            "document": name,
+            "input_words": len(text.split()),
+            "input_tokens": input_tokens,
+            # Transcripts under 2000 words are summarized in one pass
+            "chunks": len(chunks) if len(text.split()) >= 2000 else 1,
+            "tokenization_ms": round(tokenization_ms, 2),
+            "chunking_ms": round(chunking_ms, 2),
+            "configurations": []
+        }
+        for profile in profiles:
+            for extractive_budget in extractive_budgets:
+                logging.warning(f"{name}: profile={profile} extractive_budget={extractive_budget}")
+                entry["configurations"].append(
+                    run_configuration(service, recorder, text, reference, profile, extractive_budget, repeats)
+                )
+        results.append(entry)
+
+    return {
+        "commit": git_commit(),
+        "model": service.model_name,
+        "backend": service.backend.name,
+        "torch_threads": torch.get_num_threads(),
+        "cpu": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "repeats": repeats,
+        "results": results
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report: dict, baseline: dict) -> list:
+    """p50 latency and ROUGE-L of every configuration against the same configuration of a baseline report"""
+    def index(r):
+        return {
+            (entry["document"], config["profile"], config["extractive_budget"]): config
+            for entry in r["results"]
+            for config in entry["configurations"]
+        }
+
+    previous = index(baseline)
+    rows = []
+    for key, config in index(report).items():
+        if key not in previous:
+            continue
+        before = previous[key]
+        row = {
+            "document": key[0],
+            "profile": key[1],
+            "extractive_budget": key[2],
+            "p50_ms": config["latency_ms"]["p50"],
+            "baseline_p50_ms": before["latency_ms"]["p50"],
+            "speedup": round(before["latency_ms"]["p50"] / config["latency_ms"]["p50"], 3) if config["latency_ms"]["p50"] else None
+        }
+        if "rouge" in config and "rouge" in before:
+            row["rouge_l_delta"] = round(config["rouge"]["rougeL"] - before["rouge"]["rougeL"], 4)
+        rows.append(row)
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SummarizationService on the bundled French corpus")
+    parser.add_argument("--profiles", nargs="+", default=[DEFAULT_GENERATION_PROFILE], choices=list(GENERATION_PROFILES), help="Generation profiles to run")
+    parser.add_argument("--extractive-budgets", nargs="+", type=int, default=[0], help="Extractive token budgets to run (0 disables the stage)")
+    parser.add_argument("--repeats", type=int, default=3, help="Measured runs per configuration, after one warm-up run")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Directory of <name>.txt transcripts and <name>.reference.txt summaries")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run(args.profiles, args.extractive_budgets, max(1, args.repeats), args.corpus)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
@@ -1,22 +1,42 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from app.core.database import check_database_connection
+from app.core.model_registry import model_registry
 from app.utils.init_db import create_tables
+from app.routers.health import router as healthRouter
 from app.routers.auth import authRouter
 from app.routers.professeur.stt import sttRouter
 from app.routers.professeur.summarization import router as summarizationRouter
 from app.routers.professeur.cours import router as coursRouter
 from app.routers.professeur.module import router as moduleRouter
-from app.routers.professeur.recording import router as recordingRouter
+from app.routers.professeur.recording import router as recordingRouter, recorder_instance
 from app.routers.etudiant.cours import router as etudiantCoursRouter
+from app.services.professeur.summarization_job_service import SummarizationJobService
 from app.utils.protectRoute import get_current_user
 from app.db.schemas.user import UserOutput
+import logging
 import os
+import psutil
+import time
+
+logger = logging.getLogger(__name__)
+
+# Models loaded in the background once the server accepts requests (empty to load on first use only)
+PRELOAD_MODELS = [name for name in os.getenv("PRELOAD_MODELS", "summarization,whisper").split(",") if name]
 
 @asynccontextmanager
 async def lifespan(app : FastAPI):
     print("created")
+    check_database_connection()
     create_tables()
+    SummarizationJobService.fail_interrupted_jobs()
+    # Recordings cut short by a crash are left as segments: stitch them back in the background
+    recorder_instance.recover_in_background()
+    if PRELOAD_MODELS:
+        model_registry.preload(PRELOAD_MODELS)
+    cold_start = time.time() - psutil.Process(os.getpid()).create_time()
+    logger.info(f"Cold start: accepting requests {cold_start:.2f} seconds after process start")
     yield
 
 app = FastAPI(lifespan=lifespan)
@@ -34,6 +54,7 @@ app.add_middleware(
     expose_headers=["Content-Type", "Authorization"]
 )
 
+app.include_router(router=healthRouter, tags=["health"], prefix="/health")
 app.include_router(router=authRouter, tags=["auth"], prefix="/auth")
 app.include_router(router=sttRouter, tags=["stt"], prefix="/stt")
 app.include_router(router=summarizationRouter, tags=["professeur"], prefix="/professeur")